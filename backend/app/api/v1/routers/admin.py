@@ -0,0 +1,187 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import asc, desc, select
+from sqlalchemy.engine import Connection
+import json
+from ....core.database import get_db_connection
+from ....core.device_details import (
+    DEVICE_CHARACTERISTICS_QUERY,
+    DEVICE_DETAIL_QUERY,
+    RELATED_DEVICES_QUERY,
+)
+from ....core.compression import compression_stats
+from ....core.device_view import DEVICE_VIEW_TABLE
+from ....core.lanes import LANES, interactive_lane
+from ....core.query_plans import explain_query_plan
+from ....core.schema_registry import schema_registry
+from ....core.search import compare_with_like
+from ....core.specsheet import (
+    SPEC_SHEET_CHARACTERISTICS_QUERY,
+    SPEC_SHEET_DEVICES_QUERY,
+    SPEC_SHEET_RELATED_QUERY,
+)
+from .devices import build_user_devices_query
+
+router = APIRouter()
+
+LIST_PAGE_ROWS = 51  # listings fetch limit + 1 rows
+
+
+@router.get("/admin/query-plans")
+@interactive_lane.route
+def get_query_plans(conn: Connection = Depends(get_db_connection)):
+    """
+    Reports EXPLAIN QUERY PLAN for the standard list, detail and export queries.
+    Full table scans outside the expected ones are listed under "regressions".
+    """
+    try:
+        mt_device = schema_registry.require_table(conn, "MT_device")
+        audit_log = schema_registry.require_table(conn, "AuditLog")
+
+        # Sample keys so the plans are those of real lookups
+        sample = (
+            conn.execute(
+                select(mt_device.c.type, mt_device.c.sheet_no, mt_device.c.status)
+                .order_by(mt_device.c.type)
+                .limit(1)
+            )
+            .mappings()
+            .first()
+        ) or {"type": "", "sheet_no": "", "status": ""}
+
+        # The device listing reads device_view (MT_device on pre-view databases)
+        listing_table = (
+            DEVICE_VIEW_TABLE
+            if schema_registry.get_table(conn, DEVICE_VIEW_TABLE) is not None
+            else "MT_device"
+        )
+        listing, column_map = build_user_devices_query(conn, None, None)
+        search_listing, _ = build_user_devices_query(conn, sample["type"][:6], None)
+        filtered_listing, _ = build_user_devices_query(
+            conn, None, json.dumps({"Status": sample["status"] or ""})
+        )
+
+        queries = {
+            "device_list": (
+                listing.order_by(asc(column_map["Device Type"])).limit(LIST_PAGE_ROWS),
+                None,
+                [listing_table],
+            ),
+            "device_list_sorted": (
+                listing.order_by(desc(column_map["Sheet Name"])).limit(LIST_PAGE_ROWS),
+                None,
+                [listing_table],
+            ),
+            "device_list_search": (search_listing.limit(LIST_PAGE_ROWS), None, []),
+            # Prefix filters compile to an index range
+            "device_list_filter": (filtered_listing.limit(LIST_PAGE_ROWS), None, []),
+            "device_export": (listing, None, [listing_table]),
+            "device_detail": (
+                DEVICE_DETAIL_QUERY,
+                {"device_type": sample["type"]},
+                [],
+            ),
+            "device_characteristics": (
+                DEVICE_CHARACTERISTICS_QUERY,
+                {"device_type": sample["type"]},
+                [],
+            ),
+            "related_devices": (
+                RELATED_DEVICES_QUERY,
+                {"sheet_no": sample["sheet_no"]},
+                [],
+            ),
+            "spec_sheet_devices": (
+                SPEC_SHEET_DEVICES_QUERY,
+                {"device_types": [sample["type"]]},
+                [],
+            ),
+            "spec_sheet_characteristics": (
+                SPEC_SHEET_CHARACTERISTICS_QUERY,
+                {"sheet_nos": [sample["sheet_no"]]},
+                [],
+            ),
+            "spec_sheet_related_devices": (
+                SPEC_SHEET_RELATED_QUERY,
+                {"sheet_nos": [sample["sheet_no"]]},
+                [],
+            ),
+            "audit_log_list": (
+                select(audit_log)
+                .order_by(desc(audit_log.c.timestamp))
+                .limit(LIST_PAGE_ROWS),
+                None,
+                [],
+            ),
+        }
+
+        plans = {
+            name: explain_query_plan(conn, stmt, params, allowed_scans)
+            for name, (stmt, params, allowed_scans) in queries.items()
+        }
+        return {
+            "queries": plans,
+            "regressions": [
+                name for name, plan in plans.items() if plan["unexpected_scans"]
+            ],
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/admin/lanes")
+def get_lane_stats():
+    """Returns concurrency, queue depth and rejection counters of the executor lanes."""
+    return {lane.name: lane.stats() for lane in LANES}
+
+
+@router.get("/admin/compression")
+def get_compression_stats():
+    """Returns bytes before/after, ratio and compression time per route."""
+    return compression_stats.stats()
+
+
+@router.get("/admin/search-parity")
+@interactive_lane.route
+def get_search_parity(
+    term: List[str] = Query(..., description="Search terms to compare"),
+    conn: Connection = Depends(get_db_connection),
+):
+    """
+    Compares the index-backed global search with the LIKE substring search it
+    replaced, per term and indexed table. Tables where the two differ are
+    listed under "mismatches".
+    """
+    try:
+        # device_view is internal but serves the device listing search
+        indexed_tables = [
+            name
+            for name in schema_registry.table_names(conn) + [DEVICE_VIEW_TABLE]
+            if schema_registry.has_search_index(conn, name)
+        ]
+        results = {
+            search_term: {
+                name: compare_with_like(
+                    conn, schema_registry.require_table(conn, name), search_term
+                )
+                for name in indexed_tables
+            }
+            for search_term in term
+        }
+        return {
+            "terms": results,
+            "mismatches": [
+                {"term": search_term, "table": name, **counts}
+                for search_term, tables in results.items()
+                for name, counts in tables.items()
+                if counts["missing"] or counts["extra"]
+            ],
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
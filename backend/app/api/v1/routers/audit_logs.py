@@ -1,14 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
-from sqlalchemy import select, or_, asc, desc, func, cast, String, MetaData, Table
+from sqlalchemy import select, asc, desc
+from sqlalchemy.engine import Connection
 import json
-from ....core.database import get_db_engine
+from ....core.database import get_db_connection
+from ....core.schema_registry import schema_registry
+from ....core.search import apply_search
+from ....core.pagination import paginate_by_cursor
+from ....core.projection import page_limit, table_projection
+from ....core.responses import FastJSONResponse, check_row_format, rows_payload
+from ....core.counts import count_rows
+from ....core.filters import FilterError
+from ....core.lanes import interactive_lane
 from ....core.utils import apply_filters
 
 router = APIRouter()
 
 
 @router.get("/audit-logs")
+@interactive_lane.route
 def get_audit_logs(
     page: int = 1,
     limit: int = 50,
@@ -16,28 +26,47 @@ def get_audit_logs(
     sort_by: Optional[str] = None,
     descending: bool = False,
     filters: Optional[str] = None,
+    pagination: str = "offset",  # offset or cursor
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    format: str = "records",  # records or columnar
+    columns: Optional[str] = None,  # comma-separated projection
+    fields: str = "all",  # all or summary
+    conn: Connection = Depends(get_db_connection),
 ):
-    """Returns paginated audit log data with optional search, sort, and column filters."""
+    """
+    Returns paginated audit log data with optional search, sort, and column filters.
+    With pagination=cursor (or a cursor token), pages are fetched by keyset instead of OFFSET.
+    With include_total=false the total count is skipped and only has_more is returned.
+    With format=columnar rows are returned as {"columns": [...], "rows": [[...]]}.
+    columns=a,b selects only those columns (plus id); fields=summary leaves out
+    the details. limit is capped at MAX_PAGE_SIZE.
+    """
     try:
-        engine = get_db_engine()
+        columnar = check_row_format(format)
+        limit = page_limit(limit)
+        cursor_mode = pagination == "cursor" or cursor is not None
 
         # Calculate offset
         offset = (page - 1) * limit
 
-        metadata = MetaData()
-        table = Table("AuditLog", metadata, autoload_with=engine)
-
-        # Base query
-        stmt = select(table)
+        table = schema_registry.require_table(conn, "AuditLog")
+
+        # Base query, projected to the requested columns (keys always included)
+        cursor_sort = None
+        if cursor_mode:
+            cursor_sort = (
+                sort_by if sort_by and sort_by in table.columns else "timestamp"
+            )
+        projection = table_projection(table, columns, fields, ["id", cursor_sort])
+        if projection is not None:
+            stmt = select(*[table.columns[name] for name in projection])
+        else:
+            stmt = select(table)
 
         # Apply Global Search
         if search:
-            search_conditions = []
-            for column in table.columns:
-                search_conditions.append(cast(column, String).ilike(f"%{search}%"))
-
-            if search_conditions:
-                stmt = stmt.where(or_(*search_conditions))
+            stmt = apply_search(conn, stmt, table, search)
 
         # Apply Column Filters
         if filters:
@@ -48,6 +77,47 @@ def get_audit_logs(
                 stmt = apply_filters(stmt, filters_dict, column_map)
             except json.JSONDecodeError:
                 pass  # Ignore invalid JSON
+            except FilterError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        # Count total results (before pagination)
+        total_records = None
+        if include_total:
+            total_records = count_rows(
+                conn,
+                stmt,
+                base_table="AuditLog",
+                depends_on=["AuditLog"],
+                cache_key=(search, filters),
+                filtered=bool(search or filters),
+            )
+
+        if cursor_mode:
+            # Default order is newest first, the same as the offset mode below
+            sort_column = sort_by if sort_by and sort_by in table.columns else None
+            if sort_column is None and "timestamp" in table.columns:
+                sort_column, descending = "timestamp", True
+            keys = [(sort_column, table.columns[sort_column])] if sort_column else []
+            if sort_column != "id":
+                keys.append(("id", table.columns["id"]))
+            page_data = paginate_by_cursor(
+                conn,
+                stmt,
+                keys,
+                descending,
+                limit,
+                cursor,
+                sort_token=f"{sort_column or ''}:{int(descending)}",
+                columnar=columnar,
+            )
+            return FastJSONResponse(
+                {
+                    "table": "AuditLog",
+                    **page_data,
+                    "total": total_records,
+                    "limit": limit,
+                }
+            )
 
         # Apply Sort
         if sort_by:
@@ -62,31 +132,33 @@ def get_audit_logs(
             if "timestamp" in table.columns:
                 stmt = stmt.order_by(desc(table.columns["timestamp"]))
 
-        # Count total results (before pagination)
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-
-        # Apply Pagination
-        stmt = stmt.limit(limit).offset(offset)
-
-        with engine.connect() as conn:
-            # Execute count
-            total_records = conn.execute(count_stmt).scalar()
-
-            # Execute data fetch
-            result = conn.execute(stmt)
-            data = [dict(row._mapping) for row in result]
-
-        total_pages = (total_records + limit - 1) // limit if limit > 0 else 1
-
-        return {
-            "table": "AuditLog",
-            "data": data,
-            "total": total_records,
-            "page": page,
-            "limit": limit,
-            "total_pages": total_pages,
-        }
-
+        # Apply Pagination (one extra row tells whether another page exists)
+        stmt = stmt.limit(limit + 1).offset(offset)
+
+        # Execute data fetch
+        result = conn.execute(stmt)
+        rows = result.all()
+        has_more = len(rows) > limit
+        page_rows = rows_payload(result.keys(), rows[:limit], columnar)
+
+        total_pages = None
+        if total_records is not None:
+            total_pages = (total_records + limit - 1) // limit if limit > 0 else 1
+
+        return FastJSONResponse(
+            {
+                "table": "AuditLog",
+                **page_rows,
+                "total": total_records,
+                "page": page,
+                "limit": limit,
+                "total_pages": total_pages,
+                "has_more": has_more,
+            }
+        )
+
+    except HTTPException as he:
+        raise he
     except Exception as e:
         import traceback
 
@@ -0,0 +1,299 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import Any, Dict, Optional
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from datetime import datetime
+import os
+import subprocess
+import sys
+from pydantic import BaseModel
+from ....core.config import settings
+from ....core.database import get_db_connection, get_db_engine
+from ....core.export import export_file_type, write_export
+from ....core.import_progress import parse_progress
+from ....core.jobs import (
+    ACTIVE_STATUSES,
+    JobConflictError,
+    JobContext,
+    JobQueueFullError,
+    job_manager,
+)
+from ....core.schema_registry import schema_registry
+from ....core.specsheet import iter_spec_sheet_zip
+from .devices import (
+    BulkSpecSheetExportPayload,
+    build_user_devices_export_query,
+    bulk_spec_sheet_export_entries,
+)
+from .tables import build_table_export_query
+
+router = APIRouter()
+
+IMPORT_SCRIPT = settings.BASE_DIR / "app" / "scripts" / "import_data.py"
+
+
+class ExportJobPayload(BaseModel):
+    search: Optional[str] = None
+    sort_by: Optional[str] = None
+    descending: bool = False
+    filters: Optional[str] = None
+    format: str = "excel"  # excel or csv
+
+
+class TableExportJobPayload(ExportJobPayload):
+    table_name: str
+
+
+class ImportJobPayload(BaseModel):
+    incremental: bool = True
+    force: bool = False
+
+
+def _count(conn: Connection, stmt: Select) -> int:
+    return conn.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar_one()
+
+
+def _connect() -> Connection:
+    """Connection for a job runner; picks up a newly published database like get_db_connection."""
+    schema_registry.refresh_if_stale()
+    return get_db_engine().connect()
+
+
+def _export_rows(job: JobContext, stmt: Select, params: Dict, filename_base: str):
+    with _connect() as conn:
+        total = _count(conn, stmt)
+    filename, media_type = export_file_type(params["format"], filename_base)
+    with open(job.artifact(filename, media_type), "wb") as output:
+        write_export(
+            stmt,
+            params["format"],
+            output,
+            progress=lambda done: job.progress(done, total),
+        )
+    job.progress(total, total)
+    return f"Exported {total} rows"
+
+
+def run_table_export(job: JobContext, params: Dict[str, Any]) -> str:
+    with _connect() as conn:
+        stmt = build_table_export_query(
+            conn,
+            params["table_name"],
+            params["search"],
+            params["sort_by"],
+            params["descending"],
+            params["filters"],
+        )
+    return _export_rows(job, stmt, params, params["table_name"])
+
+
+def run_user_devices_export(job: JobContext, params: Dict[str, Any]) -> str:
+    with _connect() as conn:
+        stmt = build_user_devices_export_query(
+            conn,
+            params["search"],
+            params["sort_by"],
+            params["descending"],
+            params["filters"],
+        )
+    return _export_rows(job, stmt, params, "user_devices")
+
+
+def run_spec_sheet_export(job: JobContext, params: Dict[str, Any]) -> str:
+    with _connect() as conn:
+        entries = bulk_spec_sheet_export_entries(
+            conn, BulkSpecSheetExportPayload(**params)
+        )
+    total = len(entries)
+    filename = f"spec_sheets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    with open(job.artifact(filename, "application/zip"), "wb") as output:
+        for chunk in iter_spec_sheet_zip(
+            entries, progress=lambda done: job.progress(done, total)
+        ):
+            output.write(chunk)
+    return f"Exported {total} spec sheets"
+
+
+def run_import(job: JobContext, params: Dict[str, Any]) -> str:
+    """Runs the import script in a subprocess; its output is kept as the job's log file."""
+    args = [sys.executable, "-u", str(IMPORT_SCRIPT), "--progress-json"]
+    if params["incremental"]:
+        args.append("--incremental")
+    if params["force"]:
+        args.append("--force")
+
+    done = 0
+    last_line = ""
+    log_path = job.artifact(
+        "import_log.txt", "text/plain; charset=utf-8", keep_on_failure=True
+    )
+    with (
+        open(log_path, "w", encoding="utf-8") as log,
+        subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+        ) as process,
+    ):
+        assert process.stdout is not None
+        for line in process.stdout:
+            progress = parse_progress(line)
+            if progress is not None:
+                done = progress.get("done") or done
+                job.progress(
+                    done,
+                    progress.get("total"),
+                    message=progress["message"],
+                    percent=progress["percent"],
+                )
+                continue
+            log.write(line)
+            if line.strip():
+                last_line = line.strip()
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"Import failed (exit code {process.returncode}): {last_line}"
+        )
+    return last_line
+
+
+# Register the job runners
+job_manager.register("table_export", run_table_export)
+job_manager.register("user_devices_export", run_user_devices_export)
+job_manager.register("spec_sheet_export", run_spec_sheet_export)
+job_manager.register("import", run_import)
+
+
+def _submit(
+    kind: str, params: Dict[str, Any], exclusive: bool = False
+) -> Dict[str, Any]:
+    try:
+        return job_manager.submit(kind, params, exclusive=exclusive)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+
+
+@router.post("/jobs/exports/table", status_code=status.HTTP_202_ACCEPTED)
+def submit_table_export(
+    payload: TableExportJobPayload, conn: Connection = Depends(get_db_connection)
+):
+    """Starts a background export of a table; poll GET /jobs/{id}, then download."""
+    try:
+        # Validates the table and filters before queueing
+        build_table_export_query(
+            conn,
+            payload.table_name,
+            payload.search,
+            payload.sort_by,
+            payload.descending,
+            payload.filters,
+        )
+        return _submit("table_export", payload.model_dump())
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs/exports/user-devices", status_code=status.HTTP_202_ACCEPTED)
+def submit_user_devices_export(
+    payload: ExportJobPayload, conn: Connection = Depends(get_db_connection)
+):
+    """Starts a background export of the device listing."""
+    try:
+        build_user_devices_export_query(
+            conn, payload.search, payload.sort_by, payload.descending, payload.filters
+        )
+        return _submit("user_devices_export", payload.model_dump())
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs/exports/spec-sheets", status_code=status.HTTP_202_ACCEPTED)
+def submit_spec_sheet_export(payload: BulkSpecSheetExportPayload):
+    """Starts a background bulk spec-sheet export (ZIP), like POST /devices/export-excel."""
+    try:
+        return _submit("spec_sheet_export", payload.model_dump())
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/jobs/import", status_code=status.HTTP_202_ACCEPTED)
+def submit_import(payload: ImportJobPayload):
+    """Starts the Excel import in the background (one import at a time)."""
+    try:
+        return _submit("import", payload.model_dump(), exclusive=True)
+
+    except JobConflictError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"An import is already {e.job['status']} (job {e.job['id']})",
+        )
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs")
+def list_jobs(limit: int = 50, kind: Optional[str] = None):
+    """Returns the most recent jobs, newest first."""
+    try:
+        return {"jobs": job_manager.list(limit=limit, kind=kind)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Returns the status, progress, row counts and error of a job."""
+    try:
+        job = job_manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        return job
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_job_artifact(job_id: str):
+    """Downloads the result file of a finished job."""
+    try:
+        job = job_manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        path = job_manager.artifact_path(job)
+        if path is None:
+            raise HTTPException(
+                status_code=409 if job["status"] in ACTIVE_STATUSES else 404,
+                detail=f"Job '{job_id}' has no file to download (status: {job['status']})",
+            )
+        return FileResponse(
+            path, media_type=job["media_type"], filename=job["download_name"]
+        )
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
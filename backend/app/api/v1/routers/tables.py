@@ -1,27 +1,35 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional, Dict, Any
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy import (
-    inspect,
+    Column,
+    Table,
     select,
-    or_,
     asc,
     desc,
-    func,
-    cast,
-    String,
-    MetaData,
-    Table,
     update,
     and_,
+    bindparam,
+    tuple_,
 )
-import pandas as pd
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
 import json
-from io import BytesIO
 from datetime import datetime, date
 from ....core.config import settings
-from ....core.database import get_db_engine
-from ....core.utils import apply_filters, log_audit_event
+from ....core.database import get_db_connection
+from ....core.schema_registry import schema_registry
+from ....core.search import apply_search
+from ....core.pagination import paginate_by_cursor
+from ....core.projection import page_limit, table_projection
+from ....core.responses import FastJSONResponse, check_row_format, rows_payload
+from ....core.counts import count_cache, count_rows
+from ....core.device_cache import DEVICE_SCOPED_TABLES, device_detail_cache
+from ....core.device_view import DEVICE_VIEW_SOURCES, refresh_device_view
+from ....core.export import streaming_export
+from ....core.filters import FilterError
+from ....core.generation import bump_data_generation
+from ....core.lanes import heavy_lane, interactive_lane
+from ....core.utils import apply_filters, log_audit_event, log_audit_events
 from pydantic import BaseModel, Field
 
 router = APIRouter()
@@ -41,12 +49,11 @@ class TableUpdatePayload(BaseModel):
 
 
 @router.get("/tables")
-def get_tables():
+@interactive_lane.route
+def get_tables(conn: Connection = Depends(get_db_connection)):
     """Returns a list of all tables in the database."""
     try:
-        engine = get_db_engine()
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
+        tables = schema_registry.table_names(conn)
 
         # Sort tables based on TABLE_ORDER
         # Tables not in TABLE_ORDER will be appended at the end, sorted alphabetically
@@ -67,6 +74,7 @@ def get_tables():
 
 
 @router.get("/tables/{table_name}")
+@interactive_lane.route
 def get_table_data(
     table_name: str,
     page: int = 1,
@@ -75,33 +83,54 @@ def get_table_data(
     sort_by: Optional[str] = None,
     descending: bool = False,
     filters: Optional[str] = None,
+    pagination: str = "offset",  # offset or cursor
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    format: str = "records",  # records or columnar
+    columns: Optional[str] = None,  # comma-separated projection
+    fields: str = "all",  # all or summary
+    conn: Connection = Depends(get_db_connection),
 ):
-    """Returns paginated data for a specific table with optional search, sort, and column filters."""
+    """
+    Returns paginated data for a specific table with optional search, sort, and column filters.
+    With pagination=cursor (or a cursor token), pages are fetched by keyset instead of OFFSET.
+    With include_total=false the total count is skipped and only has_more is returned.
+    With format=columnar rows are returned as {"columns": [...], "rows": [[...]]}.
+    columns=a,b selects only those columns (plus the primary key); fields=summary
+    selects the grid's summary columns. limit is capped at MAX_PAGE_SIZE.
+    """
     try:
-        engine = get_db_engine()
-        inspector = inspect(engine)
-        if table_name not in inspector.get_table_names():
+        columnar = check_row_format(format)
+        table = schema_registry.get_table(conn, table_name)
+        if table is None:
             raise HTTPException(
                 status_code=404, detail=f"Table '{table_name}' not found"
             )
 
+        cursor_mode = pagination == "cursor" or cursor is not None
+        limit = page_limit(limit)
+
         # Calculate offset
         offset = (page - 1) * limit
 
-        metadata = MetaData()
-        table = Table(table_name, metadata, autoload_with=engine)
-
-        # Base query
-        stmt = select(table)
+        # Base query, projected to the requested columns (keys always included)
+        primary_keys = [col.name for col in table.primary_key.columns]
+        cursor_sort = (
+            sort_by if cursor_mode and sort_by and sort_by in table.columns else None
+        )
+        projection = table_projection(
+            table, columns, fields, [*primary_keys, cursor_sort]
+        )
+        if projection is not None:
+            stmt = select(*[table.columns[name] for name in projection])
+        else:
+            stmt = select(table)
 
         # Apply Global Search
         if search:
-            search_conditions = []
-            for column in table.columns:
-                search_conditions.append(cast(column, String).ilike(f"%{search}%"))
-
-            if search_conditions:
-                stmt = stmt.where(or_(*search_conditions))
+            stmt = apply_search(
+                conn, stmt, table, search, rank=not sort_by and not cursor_mode
+            )
 
         # Apply Column Filters
         if filters:
@@ -112,6 +141,51 @@ def get_table_data(
                 stmt = apply_filters(stmt, filters_dict, column_map)
             except json.JSONDecodeError:
                 pass  # Ignore invalid JSON
+            except FilterError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        # Count total results (before pagination)
+        total_records = None
+        if include_total:
+            total_records = count_rows(
+                conn,
+                stmt,
+                base_table=table_name,
+                depends_on=[table_name],
+                cache_key=(search, filters),
+                filtered=bool(search or filters),
+            )
+
+        if cursor_mode:
+            if not primary_keys:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Table '{table_name}' has no primary key for cursor pagination.",
+                )
+            sort_column = sort_by if sort_by and sort_by in table.columns else None
+            keys = [(sort_column, table.columns[sort_column])] if sort_column else []
+            keys += [
+                (pk, table.columns[pk]) for pk in primary_keys if pk != sort_column
+            ]
+            page_data = paginate_by_cursor(
+                conn,
+                stmt,
+                keys,
+                descending,
+                limit,
+                cursor,
+                sort_token=f"{sort_column or ''}:{int(descending)}",
+                columnar=columnar,
+            )
+            return FastJSONResponse(
+                {
+                    "table": table_name,
+                    **page_data,
+                    "total": total_records,
+                    "limit": limit,
+                    "primary_keys": primary_keys,
+                }
+            )
 
         # Apply Sort
         if sort_by:
@@ -122,32 +196,31 @@ def get_table_data(
                 else:
                     stmt = stmt.order_by(asc(col))
 
-        # Count total results (before pagination)
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-
-        # Apply Pagination
-        stmt = stmt.limit(limit).offset(offset)
-
-        with engine.connect() as conn:
-            # Execute count
-            total_records = conn.execute(count_stmt).scalar()
-
-            # Execute data fetch
-            result = conn.execute(stmt)
-            data = [dict(row._mapping) for row in result]
-
-        total_pages = (total_records + limit - 1) // limit if limit > 0 else 1
-        primary_keys = [col.name for col in table.primary_key.columns]
-
-        return {
-            "table": table_name,
-            "data": data,
-            "total": total_records,
-            "page": page,
-            "limit": limit,
-            "total_pages": total_pages,
-            "primary_keys": primary_keys,
-        }
+        # Apply Pagination (one extra row tells whether another page exists)
+        stmt = stmt.limit(limit + 1).offset(offset)
+
+        # Execute data fetch
+        result = conn.execute(stmt)
+        rows = result.all()
+        has_more = len(rows) > limit
+        page_rows = rows_payload(result.keys(), rows[:limit], columnar)
+
+        total_pages = None
+        if total_records is not None:
+            total_pages = (total_records + limit - 1) // limit if limit > 0 else 1
+
+        return FastJSONResponse(
+            {
+                "table": table_name,
+                **page_rows,
+                "total": total_records,
+                "page": page,
+                "limit": limit,
+                "total_pages": total_pages,
+                "has_more": has_more,
+                "primary_keys": primary_keys,
+            }
+        )
 
     except HTTPException as he:
         raise he
@@ -158,7 +231,51 @@ def get_table_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def build_table_export_query(
+    conn: Connection,
+    table_name: str,
+    search: Optional[str],
+    sort_by: Optional[str],
+    descending: bool,
+    filters: Optional[str],
+) -> Select:
+    """Export query for a table; raises 404 for unknown tables and 400 for bad filters."""
+    table = schema_registry.get_table(conn, table_name)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+
+    # Base query
+    stmt = select(table)
+
+    # Apply Global Search
+    if search:
+        stmt = apply_search(conn, stmt, table, search, rank=not sort_by)
+
+    # Apply Column Filters
+    if filters:
+        try:
+            filters_dict = json.loads(filters)
+            column_map = {c.name: c for c in table.columns}
+            stmt = apply_filters(stmt, filters_dict, column_map)
+        except json.JSONDecodeError:
+            pass
+        except FilterError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Apply Sort
+    if sort_by:
+        if sort_by in table.columns:
+            col = table.columns[sort_by]
+            if descending:
+                stmt = stmt.order_by(desc(col))
+            else:
+                stmt = stmt.order_by(asc(col))
+
+    return stmt
+
+
 @router.get("/tables/{table_name}/export")
+@heavy_lane.route
 def export_table_data(
     table_name: str,
     search: Optional[str] = None,
@@ -166,73 +283,17 @@ def export_table_data(
     descending: bool = False,
     filters: Optional[str] = None,
     format: str = "excel",  # excel or csv
+    conn: Connection = Depends(get_db_connection),
 ):
     """Exports data for a specific table with optional search, sort, and column filters."""
     try:
-        engine = get_db_engine()
-        inspector = inspect(engine)
-        if table_name not in inspector.get_table_names():
-            raise HTTPException(
-                status_code=404, detail=f"Table '{table_name}' not found"
-            )
-
-        metadata = MetaData()
-        table = Table(table_name, metadata, autoload_with=engine)
-
-        # Base query
-        stmt = select(table)
-
-        # Apply Global Search
-        if search:
-            search_conditions = []
-            for column in table.columns:
-                search_conditions.append(cast(column, String).ilike(f"%{search}%"))
-
-            if search_conditions:
-                stmt = stmt.where(or_(*search_conditions))
-
-        # Apply Column Filters
-        if filters:
-            try:
-                filters_dict = json.loads(filters)
-                column_map = {c.name: c for c in table.columns}
-                stmt = apply_filters(stmt, filters_dict, column_map)
-            except json.JSONDecodeError:
-                pass
-
-        # Apply Sort
-        if sort_by:
-            if sort_by in table.columns:
-                col = table.columns[sort_by]
-                if descending:
-                    stmt = stmt.order_by(desc(col))
-                else:
-                    stmt = stmt.order_by(asc(col))
-
-        # Execute query
-        with engine.connect() as conn:
-            result = conn.execute(stmt)
-            data = [dict(row._mapping) for row in result]
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-
-        output = BytesIO()
-        if format == "csv":
-            df.to_csv(output, index=False)
-            media_type = "text/csv"
-            filename = f"{table_name}.csv"
-        else:
-            df.to_excel(output, index=False, engine="openpyxl")
-            media_type = (
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            filename = f"{table_name}.xlsx"
-
-        output.seek(0)
-        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-        return StreamingResponse(output, headers=headers, media_type=media_type)
+        stmt = build_table_export_query(
+            conn, table_name, search, sort_by, descending, filters
+        )
+        return streaming_export(stmt, format, table_name)
 
+    except HTTPException as he:
+        raise he
     except Exception as e:
         import traceback
 
@@ -241,12 +302,19 @@ def export_table_data(
 
 
 @router.patch("/tables/{table_name}")
-def update_table_row(table_name: str, payload: TableUpdatePayload):
+def update_table_row(
+    table_name: str,
+    payload: TableUpdatePayload,
+    conn: Connection = Depends(get_db_connection),
+):
     """Updates a single row in the specified table using primary key filters."""
     try:
-        engine = get_db_engine()
-        metadata = MetaData()
-        table = Table(table_name, metadata, autoload_with=engine)
+        table = schema_registry.get_table(conn, table_name)
+        if table is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Table '{table_name}' not found",
+            )
 
         pk_columns = [col.name for col in table.primary_key.columns]
         if not pk_columns:
@@ -284,46 +352,280 @@ def update_table_row(table_name: str, payload: TableUpdatePayload):
             if expected_date is not None:
                 filters.append(table.columns[updated_at_column] == expected_date)
 
+        # Rows before and after the update tell which cached device details
+        # and device_view rows go stale
+        previous = None
+        if table_name in DEVICE_SCOPED_TABLES or table_name in DEVICE_VIEW_SOURCES:
+            previous = (
+                conn.execute(select(table).where(and_(*filters[: len(pk_columns)])))
+                .mappings()
+                .first()
+            )
+
         stmt = update(table).where(and_(*filters)).values(**update_values)
 
-        with engine.begin() as conn:
-            result = conn.execute(stmt)
-            if result.rowcount == 0:
-                conflict_detail = (
-                    "No rows were updated. The record may not exist or the optimistic "
-                    "lock value mismatched."
+        result = conn.execute(stmt)
+        if result.rowcount == 0:
+            conflict_detail = (
+                "No rows were updated. The record may not exist or the optimistic "
+                "lock value mismatched."
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail=conflict_detail
+            )
+
+        refreshed = (
+            conn.execute(
+                select(table).where(
+                    and_(
+                        *[
+                            table.columns[col] == payload.primary_key[col]
+                            for col in pk_columns
+                        ]
+                    )
+                )
+            )
+            .mappings()
+            .first()
+        )
+
+        refresh_device_view(conn, table_name, [previous, refreshed])
+
+        log_audit_event(
+            conn,
+            action="update",
+            target=f"{table_name}:{json.dumps(payload.primary_key, ensure_ascii=False)}",
+            details=json.dumps(
+                {"changes": _serialize_values(update_values), "table": table_name},
+                ensure_ascii=False,
+                default=str,
+            ),
+        )
+        conn.commit()
+        count_cache.invalidate(table_name, "AuditLog")
+        device_detail_cache.invalidate_rows(table_name, [previous, refreshed])
+        bump_data_generation()
+
+        return {"table": table_name, "data": refreshed}
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class TableBatchUpdatePayload(BaseModel):
+    updates: List[TableUpdatePayload] = Field(
+        ..., description="Rows to update, each like the single-row PATCH payload"
+    )
+    atomic: bool = Field(
+        default=False,
+        description="Reject the whole batch (409) if any row conflicts instead of skipping those rows",
+    )
+
+
+@router.patch("/tables/{table_name}/rows")
+def update_table_rows(
+    table_name: str,
+    payload: TableBatchUpdatePayload,
+    conn: Connection = Depends(get_db_connection),
+):
+    """
+    Updates many rows of a table in one transaction.
+    Rows whose 更新日 no longer matches expected_updated_at (or that no longer
+    exist) are reported in conflicts and left unchanged; with atomic=true any
+    conflict rejects the whole batch.
+    """
+    try:
+        table = schema_registry.get_table(conn, table_name)
+        if table is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Table '{table_name}' not found",
+            )
+
+        pk_columns = [col.name for col in table.primary_key.columns]
+        if not pk_columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Table '{table_name}' does not expose a primary key.",
+            )
+        if len(payload.updates) > settings.MAX_BATCH_UPDATE_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A batch may update at most {settings.MAX_BATCH_UPDATE_ROWS} rows.",
+            )
+
+        updated_at_column = "更新日" if "更新日" in table.columns else None
+        today = datetime.utcnow().date()
+        keys = []
+        for index, entry in enumerate(payload.updates):
+            missing_keys = [pk for pk in pk_columns if pk not in entry.primary_key]
+            if missing_keys:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Update {index}: missing primary key values for columns: {', '.join(missing_keys)}",
                 )
+            # Keys are compared with the fetched rows, so they need the
+            # column's Python type ("12" -> 12, "2024-01-31" -> date)
+            key_values = []
+            for pk in pk_columns:
+                try:
+                    key_values.append(
+                        _coerce_key_value(table.columns[pk], entry.primary_key[pk])
+                    )
+                except (TypeError, ValueError):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Update {index}: invalid primary key value for column '{pk}'.",
+                    )
+            if not any(
+                col in table.columns and col not in pk_columns for col in entry.changes
+            ):
                 raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT, detail=conflict_detail
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Update {index}: no valid columns provided for update.",
                 )
+            keys.append(tuple(key_values))
+        if len(set(keys)) != len(keys):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The same row appears more than once in the batch.",
+            )
 
-            refreshed = (
-                conn.execute(
-                    select(table).where(
-                        and_(
-                            *[
-                                table.columns[col] == payload.primary_key[col]
-                                for col in pk_columns
-                            ]
-                        )
-                    )
+        # Take the write lock first so no row changes between the check and the update
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        # Current rows in one query: optimistic-lock check, cache and
+        # device_view invalidation
+        previous = _fetch_rows_by_key(conn, table, pk_columns, keys)
+
+        conflicts: List[Dict[str, Any]] = []
+        # Changed column set (+ whether 更新日 is checked) -> (index, parameters)
+        groups: Dict[
+            Tuple[Tuple[str, ...], bool], List[Tuple[int, Dict[str, Any]]]
+        ] = {}
+        applied = {}
+        for index, (entry, key) in enumerate(zip(payload.updates, keys)):
+            current = previous.get(key)
+            expected_date = None
+            if updated_at_column and entry.expected_updated_at is not None:
+                expected_date = _parse_date_string(entry.expected_updated_at)
+            if current is None or (
+                updated_at_column is not None
+                and expected_date is not None
+                and current[updated_at_column] != expected_date
+            ):
+                conflicts.append(
+                    {
+                        "index": index,
+                        "primary_key": entry.primary_key,
+                        "detail": "The record does not exist."
+                        if current is None
+                        else "The optimistic lock value mismatched.",
+                    }
                 )
-                .mappings()
-                .first()
+                continue
+
+            update_values = {
+                col: entry.changes[col]
+                for col in entry.changes
+                if col in table.columns and col not in pk_columns
+            }
+            if updated_at_column:
+                update_values[updated_at_column] = today
+            params = {f"pk_{i}": value for i, value in enumerate(key)}
+            params.update(
+                {f"set_{i}": value for i, value in enumerate(update_values.values())}
             )
+            if expected_date is not None:
+                params["expected"] = expected_date
+            group = (tuple(update_values), expected_date is not None)
+            groups.setdefault(group, []).append((index, params))
+            applied[index] = (entry, key, update_values)
+
+        if conflicts and payload.atomic:
+            raise _batch_conflict_error(conflicts)
+
+        for (columns, check_updated_at), group_rows in groups.items():
+            conditions = [
+                table.columns[pk] == bindparam(f"pk_{i}")
+                for i, pk in enumerate(pk_columns)
+            ]
+            if check_updated_at and updated_at_column is not None:
+                conditions.append(
+                    table.columns[updated_at_column] == bindparam("expected")
+                )
+            stmt = (
+                update(table)
+                .where(and_(*conditions))
+                .values(
+                    {
+                        table.columns[col]: bindparam(f"set_{i}")
+                        for i, col in enumerate(columns)
+                    }
+                )
+            )
+            savepoint = conn.begin_nested()
+            result = conn.execute(stmt, [params for _, params in group_rows])
+            if result.rowcount == len(group_rows):
+                savepoint.commit()
+                continue
+            # Some row no longer matched: redo the group row by row to find it
+            savepoint.rollback()
+            for index, params in group_rows:
+                if conn.execute(stmt, params).rowcount == 0:
+                    conflicts.append(
+                        {
+                            "index": index,
+                            "primary_key": applied.pop(index)[0].primary_key,
+                            "detail": "The record changed while the batch was applied.",
+                        }
+                    )
 
-            log_audit_event(
+        conflicts.sort(key=lambda conflict: conflict["index"])
+        if conflicts and payload.atomic:
+            raise _batch_conflict_error(conflicts)
+
+        refreshed = {}
+        if applied:
+            refreshed = _fetch_rows_by_key(
+                conn, table, pk_columns, [key for _, key, _ in applied.values()]
+            )
+            written = [previous[key] for _, key, _ in applied.values()] + list(
+                refreshed.values()
+            )
+            refresh_device_view(conn, table_name, written)
+            log_audit_events(
                 conn,
-                action="update",
-                target=f"{table_name}:{json.dumps(payload.primary_key, ensure_ascii=False)}",
-                details=json.dumps(
-                    {"changes": _serialize_values(update_values), "table": table_name},
-                    ensure_ascii=False,
-                    default=str,
-                ),
+                "update",
+                [
+                    (
+                        f"{table_name}:{json.dumps(entry.primary_key, ensure_ascii=False)}",
+                        json.dumps(
+                            {
+                                "changes": _serialize_values(update_values),
+                                "table": table_name,
+                            },
+                            ensure_ascii=False,
+                            default=str,
+                        ),
+                    )
+                    for entry, _, update_values in applied.values()
+                ],
             )
+            conn.commit()
+            count_cache.invalidate(table_name, "AuditLog")
+            device_detail_cache.invalidate_rows(table_name, written)
+            bump_data_generation()
 
-        return {"table": table_name, "data": refreshed}
+        return {
+            "table": table_name,
+            "updated": len(applied),
+            "data": [
+                refreshed[key] for _, key, _ in applied.values() if key in refreshed
+            ],
+            "conflicts": conflicts,
+        }
 
     except HTTPException as he:
         raise he
@@ -331,6 +633,48 @@ def update_table_row(table_name: str, payload: TableUpdatePayload):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _batch_conflict_error(conflicts: List[Dict[str, Any]]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": f"{len(conflicts)} row(s) conflicted; nothing was updated.",
+            "conflicts": conflicts,
+        },
+    )
+
+
+def _fetch_rows_by_key(
+    conn: Connection, table: Table, pk_columns: List[str], keys: List[Tuple]
+) -> Dict[Tuple, Dict[str, Any]]:
+    """Rows of the given primary keys, keyed by their primary key tuple."""
+    if len(pk_columns) == 1:
+        condition = table.columns[pk_columns[0]].in_([key[0] for key in keys])
+    else:
+        condition = tuple_(*[table.columns[pk] for pk in pk_columns]).in_(keys)
+    rows = conn.execute(select(table).where(condition)).mappings()
+    return {tuple(row[pk] for pk in pk_columns): dict(row) for row in rows}
+
+
+def _coerce_key_value(column: Column, value: Any) -> Any:
+    """Converts a primary key value from the JSON payload to the column's Python type."""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type) and not isinstance(value, bool):
+        return value
+    if python_type is date:
+        parsed = _parse_date_string(str(value))
+        if parsed is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        return parsed
+    if python_type is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"Invalid integer: {value!r}")
+    return python_type(value)
+
+
 def _parse_date_string(value: Optional[str]) -> Optional[date]:
     if value is None:
         return None
@@ -0,0 +1,210 @@
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+import time
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+
+brotli: Optional[ModuleType]
+try:
+    import brotli  # type: ignore[no-redef, import-not-found, import-untyped, unused-ignore]
+except ImportError:  # optional: uv sync --extra speedups
+    brotli = None
+
+# Formats that are already compressed (xlsx/zip archives, images)
+INCOMPRESSIBLE_TYPES = (
+    "image/",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument.",
+)
+# Responses without a (full) body to compress
+SKIPPED_STATUSES = (204, 206, 304)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks br (when brotli is installed) or gzip from an Accept-Encoding header."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compressor(
+    encoding: str,
+) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes], Callable[[], bytes]]:
+    """(compress chunk, flush, finish) functions of a streaming compressor."""
+    if encoding == "br":
+        assert brotli is not None  # choose_encoding only picks br when installed
+        compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits 31: zlib stream with a gzip header and trailer
+    compressobj = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (
+        compressobj.compress,
+        lambda: compressobj.flush(zlib.Z_SYNC_FLUSH),
+        compressobj.flush,
+    )
+
+
+class CompressionStats:
+    """Bytes before/after and time spent compressing, per route name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self, route: str, encoding: str, bytes_in: int, bytes_out: int, seconds: float
+    ) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(
+                route,
+                {"responses": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0},
+            )
+            entry["responses"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["seconds"] += seconds
+            entry[encoding] = entry.get(encoding, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            routes = {route: dict(entry) for route, entry in self._routes.items()}
+        for entry in routes.values():
+            entry["ratio"] = (
+                round(entry["bytes_out"] / entry["bytes_in"], 3)
+                if entry["bytes_in"]
+                else None
+            )
+            entry["ms_per_response"] = round(
+                entry.pop("seconds") * 1000 / entry["responses"], 3
+            )
+        return routes
+
+
+# Create a singleton instance
+compression_stats = CompressionStats()
+
+
+class _CompressingResponder:
+    """Wraps send for one response; holds the start message until the first body part."""
+
+    def __init__(self, scope: Scope, send: Send, encoding: str):
+        self.scope = scope
+        self.send_message = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.active: Optional[bool] = None  # None until the first body part
+        self.compress: Optional[Callable[[bytes], bytes]] = None
+        self.flush: Optional[Callable[[], bytes]] = None
+        self.finish: Optional[Callable[[], bytes]] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                message["status"] in SKIPPED_STATUSES
+                or "content-encoding" in headers
+                or content_type.startswith(INCOMPRESSIBLE_TYPES)
+            ):
+                self.active = False
+                await self.send_message(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.active is False:
+            await self.send_message(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.active is None:
+            # Small complete bodies are not worth compressing; streamed
+            # responses (exports) are compressed whatever their size
+            if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                self.active = False
+                assert self.start is not None  # held since http.response.start
+                await self.send_message(self.start)
+                await self.send_message(message)
+                return
+            self.active = True
+            self.compress, self.flush, self.finish = _compressor(self.encoding)
+        assert self.compress is not None
+        assert self.flush is not None and self.finish is not None
+
+        started = time.perf_counter()
+        data = self.compress(body)
+        # Flushed per chunk so the client gets each part as it is produced,
+        # not when the compressor's buffer fills
+        data += self.flush() if more_body else self.finish()
+        self.seconds += time.perf_counter() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(data)
+
+        if self.start is not None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            del headers["content-length"]
+            if not more_body:
+                headers["Content-Length"] = str(len(data))
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            await self.send_message(self.start)
+            self.start = None
+        if data or not more_body:
+            await self.send_message(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+        if not more_body:
+            # Keyed by route name (e.g. get_user_devices), or path if unrouted
+            route = self.scope.get("route")
+            compression_stats.record(
+                getattr(route, "name", None) or self.scope["path"],
+                self.encoding,
+                self.bytes_in,
+                self.bytes_out,
+                self.seconds,
+            )
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli compression of responses, negotiated by Accept-Encoding.
+
+    Complete bodies under COMPRESSION_MIN_SIZE bytes and already compressed
+    formats (xlsx, zip, images) are sent as is. Streamed responses (CSV
+    exports) are compressed chunk by chunk as they are produced. Ratio and
+    compression time per route are available from compression_stats.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(scope, send, encoding)
+        await self.app(scope, receive, responder.send)
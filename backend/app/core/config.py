@@ -1,6 +1,10 @@
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# pandas read_excel engines
+ExcelEngine = Literal["calamine", "openpyxl", "xlrd", "odf", "pyxlsb"]
+
 
 class Settings(BaseSettings):
     """Application settings using Pydantic Settings."""
@@ -30,6 +34,80 @@ class Settings(BaseSettings):
     DB_FILE: Path = STORAGE_DIR / DB_NAME
     DB_URL: str = f"sqlite:///{STORAGE_DIR / DB_NAME}"
 
+    # Connection Pool Configuration
+    # "queue" keeps a shared pool of connections usable from any worker thread,
+    # "singleton" keeps exactly one connection per thread.
+    DB_POOL_CLASS: Literal["queue", "singleton"] = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+
+    # SQLite connect-time PRAGMAs (applied to every pooled connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_CACHE_SIZE: int = -64 * 1024  # negative value = KiB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Paginated listing total counts (cached per table/search/filters)
+    COUNT_CACHE_MAX_ENTRIES: int = 512
+    COUNT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Device detail payloads (drawer), invalidated on writes and imports
+    DEVICE_DETAIL_CACHE_MAX_ENTRIES: int = 1024
+    DEVICE_DETAIL_CACHE_TTL_SECONDS: float = 600.0
+
+    # Streaming exports (CSV/XLSX)
+    EXPORT_CHUNK_ROWS: int = 1000
+    EXPORT_STREAM_BYTES: int = 64 * 1024
+    EXPORT_TEMP_DIR: Path | None = None  # None = system temp directory
+
+    # Excel import (IMPORT_BATCH_ROWS = rows per validation / executemany batch)
+    IMPORT_BATCH_ROWS: int = 5000
+    IMPORT_WORKERS: int = 0  # sheet parsing processes; 0 = one per CPU core
+    # pandas read engine; None = calamine if python-calamine is installed, else openpyxl
+    IMPORT_EXCEL_ENGINE: ExcelEngine | None = None
+
+    # Pre-scaled chip appearance images (named by source hash and size)
+    CHIP_IMAGE_CACHE_DIR: Path = STORAGE_DIR / "image_cache"
+    CHIP_IMAGE_EXPORT_PX: int = 189  # 5cm at 96 DPI, embedded in spec sheets
+    CHIP_IMAGE_THUMBNAIL_PX: int = 200  # detail drawer
+
+    # Largest page a list endpoint returns (larger limits are capped)
+    MAX_PAGE_SIZE: int = 1000
+    # Most rows a batch update (PATCH /api/tables/{name}/rows) may change
+    MAX_BATCH_UPDATE_ROWS: int = 1000
+
+    # HTTP caching of read endpoints (ETag + Cache-Control); 0 = always revalidate
+    API_CACHE_MAX_AGE_SECONDS: int = 0
+    STATIC_CACHE_MAX_AGE_SECONDS: int = 3600
+
+    # Response compression (gzip, or brotli when installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; streamed responses are always compressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # Bulk spec-sheet export (ZIP); rendering processes, 0 = one per CPU core
+    SPEC_SHEET_EXPORT_WORKERS: int = 0
+
+    # Executor lanes: threads per lane and calls allowed to wait (then 503)
+    # "interactive" = listings and details, "heavy" = exports and image scaling
+    INTERACTIVE_LANE_WORKERS: int = 8
+    INTERACTIVE_LANE_QUEUE: int = 64
+    HEAVY_LANE_WORKERS: int = 2
+    HEAVY_LANE_QUEUE: int = 8
+
+    # Background jobs (large exports, imports): state database, result files,
+    # worker threads, waiting jobs allowed and how long finished jobs are kept
+    JOBS_DB_FILE: Path = STORAGE_DIR / "jobs.db"
+    JOB_ARTIFACT_DIR: Path = STORAGE_DIR / "job_artifacts"
+    JOB_WORKERS: int = 2
+    JOB_MAX_QUEUED: int = 20
+    JOB_RETENTION_HOURS: float = 24.0
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 0.5
+
     # Table Display Order
     TABLE_ORDER: list[str] = [
         "MT_spec_sheet",
@@ -46,6 +124,21 @@ class Settings(BaseSettings):
         "MT_status",
     ]
 
+    @property
+    def schema_stamp_file(self) -> Path:
+        """Stamp file written by the import script whenever the schema is rebuilt."""
+        return self.DB_FILE.with_name(f"{self.DB_FILE.name}.stamp")
+
+    @property
+    def data_generation_file(self) -> Path:
+        """Counter bumped by every committed data change (HTTP validators / ETags)."""
+        return self.DB_FILE.with_name(f"{self.DB_FILE.name}.generation")
+
+    @property
+    def import_fingerprint_file(self) -> Path:
+        """Fingerprint of the master workbook last imported (used to skip unchanged runs)."""
+        return self.DB_FILE.with_name(f"{self.DB_FILE.name}.source.json")
+
     @property
     def local_master_excel_file(self) -> Path:
         """Local master Excel file path."""
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Sequence, Tuple
+from datetime import datetime
+import threading
+import time
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from .config import settings
+from .generation import data_generation
+from .schema_registry import schema_registry
+
+STATS_TABLE = "TableStats"
+
+# (per-table write generations, shared data generation)
+Generations = Tuple[Tuple[int, ...], str]
+
+
+class CountCache:
+    """
+    LRU/TTL cache of exact COUNT(*) results for filtered listings.
+
+    Every entry remembers the write generation of the tables it was computed
+    from; invalidate(table) bumps that table's generation so stale entries
+    are ignored without scanning the cache. invalidate() only reaches this
+    process, so the snapshot also includes the shared data generation, which
+    every committed write (in any worker, or an import) advances.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Generations, float, int]]" = (
+            OrderedDict()
+        )
+        self._generations: Dict[str, int] = {}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    def _table_generations(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(name, 0) for name in tables)
+
+    def get(self, tables: Sequence[str], key: Hashable) -> Optional[int]:
+        data_token = data_generation()
+        with self._lock:
+            entry = self._entries.get((tuple(tables), key))
+            if entry is None:
+                return None
+            generations, stored_at, value = entry
+            if generations != (self._table_generations(tables), data_token) or (
+                time.monotonic() - stored_at > self.ttl_seconds
+            ):
+                del self._entries[(tuple(tables), key)]
+                return None
+            self._entries.move_to_end((tuple(tables), key))
+            return value
+
+    def set(
+        self,
+        tables: Sequence[str],
+        key: Hashable,
+        value: int,
+        generations: Generations,
+    ) -> None:
+        with self._lock:
+            table_generations, _ = generations
+            if table_generations != self._table_generations(tables):
+                return  # a write happened while counting
+            self._entries[(tuple(tables), key)] = (
+                generations,
+                time.monotonic(),
+                value,
+            )
+            self._entries.move_to_end((tuple(tables), key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tables: Sequence[str]) -> Generations:
+        """Snapshot to pass to set(); take it before counting."""
+        data_token = data_generation()
+        with self._lock:
+            return self._table_generations(tables), data_token
+
+    def invalidate(self, *tables: str) -> None:
+        with self._lock:
+            for name in tables:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Create a singleton instance
+count_cache = CountCache(
+    settings.COUNT_CACHE_MAX_ENTRIES, settings.COUNT_CACHE_TTL_SECONDS
+)
+schema_registry.add_invalidation_listener(count_cache.clear)
+schema_registry.add_data_change_listener(lambda tables: count_cache.invalidate(*tables))
+
+
+def get_row_count(conn: Connection, table_name: str) -> Optional[int]:
+    """Returns the maintained row count of a table, or None if it is not tracked."""
+    stats = schema_registry.get_table(conn, STATS_TABLE)
+    if stats is None:
+        return None
+    return conn.execute(
+        select(stats.c.row_count).where(stats.c.table_name == table_name)
+    ).scalar()
+
+
+def adjust_row_count(conn: Connection, table_name: str, delta: int) -> None:
+    """Applies an insert/delete delta to the maintained row count (same transaction)."""
+    stats = schema_registry.get_table(conn, STATS_TABLE)
+    if stats is None or not delta:
+        return
+    conn.execute(
+        stats.update()
+        .where(stats.c.table_name == table_name)
+        .values(
+            row_count=stats.c.row_count + delta,
+            updated_at=datetime.now().isoformat(),
+        )
+    )
+
+
+def refresh_row_counts(conn: Connection, table_names: Iterable[str]) -> None:
+    """Recomputes the maintained row counts (used by the import script)."""
+    stats = schema_registry.get_table(conn, STATS_TABLE)
+    if stats is None:
+        return
+    now = datetime.now().isoformat()
+    for table_name in table_names:
+        source = schema_registry.get_table(conn, table_name)
+        if source is None or source.info.get("internal"):
+            continue
+        row_count = conn.execute(select(func.count()).select_from(source)).scalar()
+        stmt = sqlite_insert(stats).values(
+            table_name=table_name, row_count=row_count, updated_at=now
+        )
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[stats.c.table_name],
+                set_={"row_count": row_count, "updated_at": now},
+            )
+        )
+
+
+def count_rows(
+    conn: Connection,
+    stmt: Select,
+    base_table: str,
+    depends_on: Sequence[str],
+    cache_key: Hashable,
+    filtered: bool,
+) -> int:
+    """
+    Total row count of a listing query.
+
+    Unfiltered listings read the maintained row count of base_table; filtered
+    ones run COUNT(*) once and reuse it until one of depends_on is written.
+    """
+    if not filtered:
+        row_count = get_row_count(conn, base_table)
+        if row_count is not None:
+            return row_count
+
+    cached = count_cache.get(depends_on, cache_key)
+    if cached is not None:
+        return cached
+
+    generations = count_cache.generations(depends_on)
+    total = conn.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+    count_cache.set(depends_on, cache_key, total or 0, generations)
+    return total or 0
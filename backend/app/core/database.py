@@ -1,9 +1,137 @@
-from sqlalchemy import create_engine
-import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+import threading
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import QueuePool, SingletonThreadPool
 from .config import settings
+from .schema_registry import published_db_file, schema_registry
 
+DB_NOT_FOUND_MESSAGE = "Database file not found. Please run import script first."
 
-def get_db_engine():
-    if not os.path.exists(str(settings.DB_FILE)):
-        raise Exception("Database file not found. Please run import script first.")
-    return create_engine(settings.DB_URL)
+_engine: Optional[Engine] = None
+_engine_file: Optional[Path] = None
+_engine_lock = threading.Lock()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the configured PRAGMAs once per new DBAPI connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+def _apply_bulk_load_pragmas(dbapi_connection, connection_record):
+    """Trades durability for speed on a database nobody else has opened yet."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.execute("PRAGMA synchronous = OFF")
+    finally:
+        cursor.close()
+
+
+def sqlite_url(db_file: Path) -> str:
+    """Connection URL for a database file (DB_URL for the configured DB_FILE)."""
+    if db_file == settings.DB_FILE:
+        return settings.DB_URL
+    return f"sqlite:///{db_file}"
+
+
+def current_db_file() -> Path:
+    """Database file currently published by the import script."""
+    return published_db_file(schema_registry.stamp)
+
+
+def create_db_engine(db_url: Optional[str] = None, bulk_load: bool = False) -> Engine:
+    """
+    Builds a SQLite engine with the configured pool and connect-time PRAGMAs.
+    Used by the API (once per process) and by the import script, which builds
+    its shadow database with bulk_load=True.
+    """
+    pool_kwargs: dict = {}
+    if settings.DB_POOL_CLASS == "singleton":
+        pool_kwargs["poolclass"] = SingletonThreadPool
+        pool_kwargs["pool_size"] = settings.DB_POOL_SIZE
+    else:
+        pool_kwargs["poolclass"] = QueuePool
+        pool_kwargs["pool_size"] = settings.DB_POOL_SIZE
+        pool_kwargs["max_overflow"] = settings.DB_MAX_OVERFLOW
+        pool_kwargs["pool_timeout"] = settings.DB_POOL_TIMEOUT
+
+    engine = create_engine(
+        db_url or settings.DB_URL,
+        connect_args={"check_same_thread": False},
+        **pool_kwargs,
+    )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    if bulk_load:
+        event.listen(engine, "connect", _apply_bulk_load_pragmas)
+    return engine
+
+
+def init_engine() -> Optional[Engine]:
+    """
+    Creates the process-wide engine if the published database file exists.
+    When the import script has published a new generation, the engine of the
+    previous file is disposed; connections still checked out finish their
+    request on the old file. Safe to call repeatedly.
+    """
+    global _engine, _engine_file
+    db_file = current_db_file()
+    if _engine is not None and _engine_file == db_file:
+        return _engine
+    with _engine_lock:
+        if _engine is not None and _engine_file != db_file:
+            _engine.dispose()
+            _engine = None
+        if _engine is None and db_file.exists():
+            _engine = create_db_engine(sqlite_url(db_file))
+            _engine_file = db_file
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Closes all pooled connections and forgets the process-wide engine."""
+    global _engine, _engine_file
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _engine_file = None
+
+
+def get_db_engine() -> Engine:
+    """
+    Returns the process-wide engine.
+    The engine is normally built at startup; if the database did not exist yet
+    (import script not run), it is built lazily on the first request after import.
+    """
+    engine = init_engine()
+    if engine is None:
+        raise Exception(DB_NOT_FOUND_MESSAGE)
+    return engine
+
+
+def get_db_connection() -> Iterator[Connection]:
+    """
+    FastAPI dependency providing a pooled connection for the duration of a request.
+    Uncommitted work is rolled back when the connection is returned to the pool.
+    A database generation published by the import script is picked up here.
+    """
+    schema_registry.refresh_if_stale()
+    try:
+        engine = get_db_engine()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    with engine.connect() as conn:
+        yield conn
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+import threading
+import time
+from .config import settings
+from .generation import data_generation
+from .schema_registry import schema_registry
+
+# Tables read by a device detail payload
+DEVICE_SCOPED_TABLES = {"MT_device", "MT_spec_sheet", "MT_elec_characteristic"}
+SHARED_MASTER_TABLES = {
+    "MT_maskset",
+    "MT_top_metal",
+    "MT_back_metal",
+    "MT_wafer_thickness",
+}
+
+
+class DeviceDetailCache:
+    """
+    LRU/TTL cache of assembled device detail payloads, keyed by device type.
+
+    A payload also lists every device on the same spec sheet, so writes
+    invalidate by device type and by sheet_no. Every invalidation bumps a
+    generation; a payload computed across an invalidation is not stored.
+
+    Invalidation only reaches this process, so every entry also records the
+    shared data generation it was read at: after a write in another worker
+    (or an import) the entry is treated as stale.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any, str, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._generation = 0
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, device_type: str) -> Optional[Dict[str, Any]]:
+        current = data_generation()
+        with self._lock:
+            entry = self._entries.get(device_type)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[device_type]
+                self.expirations += 1
+                entry = None
+            elif entry is not None and entry[2] != current:
+                del self._entries[device_type]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(device_type)
+            self.hits += 1
+            return entry[3]
+
+    def generation(self) -> Tuple[int, str]:
+        """Token to pass to set(); take it before reading the payload."""
+        current = data_generation()
+        with self._lock:
+            return self._generation, current
+
+    def set(
+        self, device_type: str, payload: Dict[str, Any], generation: Tuple[int, str]
+    ) -> None:
+        local_generation, data_token = generation
+        with self._lock:
+            if local_generation != self._generation:
+                return  # a write happened while the payload was being read
+            sheet_no = payload.get("device", {}).get("sheet_no")
+            self._entries[device_type] = (
+                time.monotonic(),
+                sheet_no,
+                data_token,
+                payload,
+            )
+            self._entries.move_to_end(device_type)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(
+        self, device_types: Iterable[str] = (), sheet_nos: Iterable[Any] = ()
+    ) -> None:
+        """Drops the given devices and every device on the given spec sheets."""
+        types = set(device_types)
+        sheets = {sheet_no for sheet_no in sheet_nos if sheet_no is not None}
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key
+                for key, (_, sheet_no, _, _) in self._entries.items()
+                if key in types or sheet_no in sheets
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def invalidate_rows(
+        self, table_name: str, rows: Iterable[Optional[Mapping[Any, Any]]]
+    ) -> None:
+        """Invalidates after a write to table_name (rows: values before and after)."""
+        if table_name in SHARED_MASTER_TABLES:
+            self.clear()
+        elif table_name in DEVICE_SCOPED_TABLES:
+            written = [row for row in rows if row is not None]
+            self.invalidate(
+                device_types=[row["type"] for row in written if "type" in row]
+                if table_name == "MT_device"
+                else (),
+                sheet_nos=[row.get("sheet_no") for row in written],
+            )
+
+    def invalidate_tables(self, table_names: Iterable[str]) -> None:
+        """Invalidation for writes whose rows are unknown (e.g. incremental imports)."""
+        if set(table_names) & (DEVICE_SCOPED_TABLES | SHARED_MASTER_TABLES):
+            self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Create a singleton instance
+device_detail_cache = DeviceDetailCache(
+    settings.DEVICE_DETAIL_CACHE_MAX_ENTRIES, settings.DEVICE_DETAIL_CACHE_TTL_SECONDS
+)
+schema_registry.add_invalidation_listener(device_detail_cache.clear)
+schema_registry.add_data_change_listener(device_detail_cache.invalidate_tables)
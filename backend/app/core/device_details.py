@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Device row with its spec sheet, maskset, metal and wafer master data.
+# When a maskset or metal code repeats in its master table the row with the
+# lowest id is used (device_view picks the same rows).
+DEVICE_DETAIL_QUERY = text("""
+    SELECT
+        d.type, d.sheet_no, d.barrier, d.passivation, d.status,
+        s.sheet_name, s.sheet_revision, s.vdss_V, s.vgss_V, s.idss_A, s.esd_display, s.maskset,
+        m.chip_x_mm, m.chip_y_mm, m.dicing_line_um, m.pad_x_gate_um, m.pad_y_gate_um, m.pad_x_source_um, m.pad_y_source_um, m.pdpw, m.appearance,
+        tm.top_metal, tm.top_metal_thickness_um, tm.top_metal_display,
+        bm.back_metal, bm.back_metal_thickness_um, bm.back_metal_display,
+        wt.wafer_thickness_um, wt.wafer_thickness_tolerance_um, wt.wafer_thickness_display
+    FROM MT_device d
+    LEFT JOIN MT_spec_sheet s ON d.sheet_no = s.sheet_no
+    LEFT JOIN MT_maskset m
+        ON m.id = (SELECT MIN(id) FROM MT_maskset WHERE maskset = s.maskset)
+    LEFT JOIN MT_top_metal tm
+        ON tm.id = (SELECT MIN(id) FROM MT_top_metal WHERE top_metal = d.top_metal)
+    LEFT JOIN MT_back_metal bm
+        ON bm.id = (SELECT MIN(id) FROM MT_back_metal WHERE back_metal = d.back_metal)
+    LEFT JOIN MT_wafer_thickness wt ON d.wafer_thickness = wt.id
+    WHERE d.type = :device_type
+""")
+
+DEVICE_CHARACTERISTICS_QUERY = text("""
+    SELECT
+        item, `+/-` as plus_minus, min, typ, max, unit,
+        bias_vgs, bias_igs, bias_vds, bias_ids, bias_vss, bias_iss, cond
+    FROM MT_elec_characteristic
+    WHERE sheet_no = (SELECT sheet_no FROM MT_device WHERE type = :device_type)
+""")
+
+# All devices sharing a spec sheet, with their display values.
+# wafer_thickness joins on the id directly (like DEVICE_DETAIL_QUERY) so the
+# primary key is used; CASTing both sides forced a scan per device.
+RELATED_DEVICES_QUERY = text("""
+    SELECT
+        d.type,
+        COALESCE(tm.top_metal_display, d.top_metal) AS top_metal_display,
+        COALESCE(wt.wafer_thickness_display, d.wafer_thickness) AS wafer_thickness_display,
+        COALESCE(bm.back_metal_display, d.back_metal) AS back_metal_display
+    FROM MT_device d
+    LEFT JOIN MT_top_metal tm
+        ON tm.id = (SELECT MIN(id) FROM MT_top_metal WHERE top_metal = d.top_metal)
+    LEFT JOIN MT_back_metal bm
+        ON bm.id = (SELECT MIN(id) FROM MT_back_metal WHERE back_metal = d.back_metal)
+    LEFT JOIN MT_wafer_thickness wt
+        ON d.wafer_thickness = wt.id
+    WHERE d.sheet_no = :sheet_no
+    ORDER BY d.type ASC
+""")
+
+
+def fetch_device_details(
+    conn: Connection, device_type: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads the detail drawer payload of a device.
+    Returns None if the device does not exist.
+    """
+    result_device = (
+        conn.execute(DEVICE_DETAIL_QUERY, {"device_type": device_type})
+        .mappings()
+        .first()
+    )
+    if not result_device:
+        return None
+    device_data = dict(result_device)
+
+    result_elec = (
+        conn.execute(DEVICE_CHARACTERISTICS_QUERY, {"device_type": device_type})
+        .mappings()
+        .all()
+    )
+    elec_data = [dict(row) for row in result_elec]
+
+    # Fetch all device types with the same sheet_no and their specific data
+    sheet_no = device_data.get("sheet_no")
+    related_devices = []
+    if sheet_no:
+        result_devices = (
+            conn.execute(RELATED_DEVICES_QUERY, {"sheet_no": sheet_no}).mappings().all()
+        )
+        related_devices = [dict(row) for row in result_devices]
+
+    return {
+        "device": device_data,
+        "characteristics": elec_data,
+        "related_devices": related_devices,
+    }
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import BindParameter, bindparam, text
+from sqlalchemy.engine import Connection
+from ..schema import device_view
+from .schema_registry import schema_registry
+
+DEVICE_VIEW_TABLE = device_view.name
+
+# Master rows are picked like the detail query (lowest id when a code repeats)
+_SOURCE_SELECT = """
+    SELECT
+        d.type, d.sheet_no, d.status, d.barrier, d.top_metal, d.passivation,
+        d.wafer_thickness, d.back_metal,
+        s.sheet_name, s.sheet_revision, s.vdss_V, s.vgss_V, s.idss_A, s.esd_display, s.maskset,
+        m.chip_x_mm, m.chip_y_mm, m.appearance,
+        tm.top_metal_display, bm.back_metal_display, wt.wafer_thickness_display
+    FROM MT_device d
+    LEFT JOIN MT_spec_sheet s ON d.sheet_no = s.sheet_no
+    LEFT JOIN MT_maskset m
+        ON m.id = (SELECT MIN(id) FROM MT_maskset WHERE maskset = s.maskset)
+    LEFT JOIN MT_top_metal tm
+        ON tm.id = (SELECT MIN(id) FROM MT_top_metal WHERE top_metal = d.top_metal)
+    LEFT JOIN MT_back_metal bm
+        ON bm.id = (SELECT MIN(id) FROM MT_back_metal WHERE back_metal = d.back_metal)
+    LEFT JOIN MT_wafer_thickness wt ON d.wafer_thickness = wt.id
+"""
+
+_INSERT = (
+    f"INSERT INTO {DEVICE_VIEW_TABLE} ("
+    + ", ".join(f'"{col.name}"' for col in device_view.columns)
+    + ")"
+)
+
+# Source table -> (device_view column holding its key, key column in the source table)
+_SOURCE_KEYS: Dict[str, Tuple[str, str]] = {
+    "MT_device": ("type", "type"),
+    "MT_spec_sheet": ("sheet_no", "sheet_no"),
+    "MT_maskset": ("maskset", "maskset"),
+    "MT_top_metal": ("top_metal", "top_metal"),
+    "MT_back_metal": ("back_metal", "back_metal"),
+    "MT_wafer_thickness": ("wafer_thickness", "id"),
+}
+DEVICE_VIEW_SOURCES = frozenset(_SOURCE_KEYS)
+
+
+def has_device_view(conn: Connection) -> bool:
+    """False for databases imported before device_view existed."""
+    return schema_registry.get_table(conn, DEVICE_VIEW_TABLE) is not None
+
+
+def rebuild_device_view(conn: Connection) -> int:
+    """Recomputes every row of device_view (import script). Returns the row count."""
+    conn.execute(text(f"DELETE FROM {DEVICE_VIEW_TABLE}"))
+    return conn.execute(text(_INSERT + _SOURCE_SELECT)).rowcount
+
+
+def refresh_devices(conn: Connection, device_types: Iterable[str]) -> None:
+    """Re-derives the device_view rows of the given devices (deleted devices are dropped)."""
+    types = list(dict.fromkeys(device_types))
+    if not types:
+        return
+    params: BindParameter[Any] = bindparam("types", expanding=True)
+    conn.execute(
+        text(f"DELETE FROM {DEVICE_VIEW_TABLE} WHERE type IN :types").bindparams(
+            params
+        ),
+        {"types": types},
+    )
+    conn.execute(
+        text(_INSERT + _SOURCE_SELECT + " WHERE d.type IN :types").bindparams(params),
+        {"types": types},
+    )
+
+
+def refresh_device_view(
+    conn: Connection, table_name: str, rows: Iterable[Optional[Mapping[Any, Any]]]
+) -> None:
+    """
+    Patches device_view after a write to one of its source tables, in the same
+    transaction. rows are the written rows' values before and after the change.
+    """
+    if table_name not in _SOURCE_KEYS or not has_device_view(conn):
+        return
+    view_column, source_column = _SOURCE_KEYS[table_name]
+    keys: List[Any] = list(
+        {row.get(source_column) for row in rows if row is not None} - {None}
+    )
+    if not keys:
+        return
+    affected: Sequence[str]
+    if table_name == "MT_device":
+        affected = keys
+    elif table_name == "MT_spec_sheet":
+        # The view may not hold the new sheet_no yet, so look devices up in the source
+        affected = (
+            conn.execute(
+                text("SELECT type FROM MT_device WHERE sheet_no IN :keys").bindparams(
+                    bindparam("keys", expanding=True)
+                ),
+                {"keys": keys},
+            )
+            .scalars()
+            .all()
+        )
+    else:
+        affected = (
+            conn.execute(
+                text(
+                    f"SELECT type FROM {DEVICE_VIEW_TABLE} WHERE {view_column} IN :keys"
+                ).bindparams(bindparam("keys", expanding=True)),
+                {"keys": keys},
+            )
+            .scalars()
+            .all()
+        )
+    refresh_devices(conn, affected)
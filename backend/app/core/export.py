@@ -0,0 +1,108 @@
+from typing import IO, Callable, Iterator, Optional, Tuple
+import csv
+import io
+import tempfile
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from sqlalchemy.sql import Select
+from .config import settings
+from .database import get_db_engine
+from .lanes import heavy_lane
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# Called with the number of rows written so far
+ExportProgress = Optional[Callable[[int], None]]
+
+
+def iter_csv(
+    stmt: Select, chunk_size: int, progress: ExportProgress = None
+) -> Iterator[bytes]:
+    """Yields the query result as UTF-8 CSV, one chunk of rows at a time."""
+    engine = get_db_engine()
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(result.keys())
+        written = 0
+        for rows in result.partitions(chunk_size):
+            writer.writerows(rows)
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(
+    stmt: Select, chunk_size: int, output: IO[bytes], progress: ExportProgress = None
+) -> None:
+    """Writes the query result with openpyxl's write-only mode (rows are not kept in memory)."""
+    engine = get_db_engine()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Sheet1")
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        ws.append(list(result.keys()))
+        written = 0
+        for rows in result.partitions(chunk_size):
+            for row in rows:
+                ws.append(list(row))
+            written += len(rows)
+            if progress is not None:
+                progress(written)
+    wb.save(output)
+
+
+def iter_xlsx(stmt: Select, chunk_size: int) -> Iterator[bytes]:
+    """Builds the workbook in a temporary file and yields it in chunks."""
+    with tempfile.TemporaryFile(dir=settings.EXPORT_TEMP_DIR) as output:
+        write_xlsx(stmt, chunk_size, output)
+        output.seek(0)
+        while chunk := output.read(settings.EXPORT_STREAM_BYTES):
+            yield chunk
+
+
+def export_file_type(format: str, filename_base: str) -> Tuple[str, str]:
+    """(file name, media type) of an export in the given format ("csv" or Excel)."""
+    if format == "csv":
+        return f"{filename_base}.csv", "text/csv"
+    return f"{filename_base}.xlsx", XLSX_MEDIA_TYPE
+
+
+def write_export(
+    stmt: Select, format: str, output: IO[bytes], progress: ExportProgress = None
+) -> None:
+    """Writes the export to a binary file (background jobs)."""
+    chunk_size = settings.EXPORT_CHUNK_ROWS
+    if format == "csv":
+        for chunk in iter_csv(stmt, chunk_size, progress):
+            output.write(chunk)
+    else:
+        write_xlsx(stmt, chunk_size, output, progress)
+
+
+def streaming_export(
+    stmt: Select, format: str, filename_base: str
+) -> StreamingResponse:
+    """
+    Returns a StreamingResponse exporting the query as CSV or XLSX.
+    Memory stays bounded by EXPORT_CHUNK_ROWS regardless of the result size.
+    The body is produced in the heavy lane.
+    """
+    chunk_size = settings.EXPORT_CHUNK_ROWS
+    filename, media_type = export_file_type(format, filename_base)
+    if format == "csv":
+        body = iter_csv(stmt, chunk_size)
+    else:
+        body = iter_xlsx(stmt, chunk_size)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(
+        heavy_lane.iterate(body), headers=headers, media_type=media_type
+    )
@@ -0,0 +1,229 @@
+from typing import Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import operator
+import re
+import string
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Integer,
+    Numeric,
+    String,
+    and_,
+    cast,
+    or_,
+)
+from sqlalchemy.sql.elements import ColumnElement
+
+# Filter syntax (one string per column):
+#   abc       prefix match on text, ignoring ASCII case (NOCASE index range);
+#             equality on numbers/booleans;
+#             the whole day/month/year on dates ("2024-05")
+#   =a|b      exact match against any of the values (IN)
+#   >=a  <=a  >a  <a
+#   a..b      between (inclusive); "a.." and "..b" are open-ended
+#   is null   is not null
+#   *abc*     substring match, case-insensitive (not indexable; only when asked for)
+_COMPARISONS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_DATE_FORMATS = (("%Y-%m-%d", "day"), ("%Y-%m", "month"), ("%Y", "year"))
+_TRUE_VALUES = {"true", "1", "yes", "y", "t"}
+_FALSE_VALUES = {"false", "0", "no", "n", "f"}
+_LIKE_SPECIAL = re.compile(r"([\\%_])")
+# SQLite's NOCASE collation folds ASCII letters only
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class FilterError(ValueError):
+    """A filter value that cannot be applied to its column's type."""
+
+
+def _next_string(prefix: str) -> Optional[str]:
+    """
+    Smallest string greater than every string starting with prefix, in NOCASE
+    order (prefix is already folded to lowercase).
+    """
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if ord("A") <= code <= ord("Z"):
+            code = ord("Z") + 1  # NOCASE sorts A-Z as a-z
+        if 0xD800 <= code <= 0xDFFF:
+            code = 0xE000  # surrogates are not valid in UTF-8
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+def _date_period(col_name: str, value: str) -> Tuple[date, date]:
+    """[start, end) of a day, month or year written as 2024-05-01, 2024-05 or 2024."""
+    text = value.replace("/", "-")
+    for fmt, unit in _DATE_FORMATS:
+        try:
+            start = datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+        if unit == "day":
+            return start, start + timedelta(days=1)
+        if unit == "month":
+            return start, (start + timedelta(days=31)).replace(day=1)
+        return start, start.replace(year=start.year + 1)
+    raise FilterError(
+        f"Invalid filter for column '{col_name}': '{value}' is not a date "
+        "(YYYY-MM-DD, YYYY-MM or YYYY)"
+    )
+
+
+class _ColumnFilter:
+    """Builds native predicates for one column according to its SQL type."""
+
+    def __init__(self, col_name: str, col):
+        self.col_name = col_name
+        self.col = col
+        col_type = col.type
+        if isinstance(col_type, (Date, DateTime)):
+            self.kind = "date"
+        elif isinstance(col_type, Boolean):
+            self.kind = "boolean"
+        elif isinstance(col_type, (Integer, Numeric)):
+            self.kind = "number"
+        else:
+            self.kind = "text"
+        self._as_datetime = isinstance(col_type, DateTime)
+
+    def _invalid(self, value: str, expected: str) -> FilterError:
+        return FilterError(
+            f"Invalid filter for column '{self.col_name}': '{value}' is not {expected}"
+        )
+
+    def _scalar(self, value: str) -> Any:
+        if self.kind == "number":
+            try:
+                return float(value)
+            except ValueError:
+                raise self._invalid(value, "a number") from None
+        if self.kind == "boolean":
+            lowered = value.lower()
+            if lowered in _TRUE_VALUES:
+                return True
+            if lowered in _FALSE_VALUES:
+                return False
+            raise self._invalid(value, "a boolean")
+        return value
+
+    def _period(self, value: str) -> Tuple[Any, Any]:
+        start, end = _date_period(self.col_name, value)
+        if self._as_datetime:
+            return (
+                datetime.combine(start, datetime.min.time()),
+                datetime.combine(end, datetime.min.time()),
+            )
+        return start, end
+
+    def prefix(self, prefix: str) -> ColumnElement:
+        # Case-insensitive like the ILIKE filter it replaced; the NOCASE indexes
+        # in app.schema serve the range
+        target = self.col.collate("NOCASE")
+        lower = prefix.translate(_ASCII_LOWER)
+        upper = _next_string(lower)
+        if upper is None:
+            return target >= lower
+        return and_(target >= lower, target < upper)
+
+    def equals(self, value: str) -> ColumnElement:
+        if self.kind == "date":
+            start, end = self._period(value)
+            return and_(self.col >= start, self.col < end)
+        return self.col == self._scalar(value)
+
+    def any_of(self, values: List[str]) -> ColumnElement:
+        if self.kind == "date":
+            return or_(*(self.equals(value) for value in values))
+        if len(values) == 1:
+            return self.equals(values[0])
+        return self.col.in_([self._scalar(value) for value in values])
+
+    def matches(self, value: str) -> ColumnElement:
+        """Default (operator-less) filter."""
+        if self.kind == "text":
+            return self.prefix(value)
+        return self.equals(value)
+
+    def compare(self, op: str, value: str) -> ColumnElement:
+        if self.kind == "date":
+            # Whole periods: ">2024-05" starts in June, "<=2024-05" ends with May
+            start, end = self._period(value)
+            bound = {">=": start, ">": end, "<=": end, "<": start}[op]
+            return self.col >= bound if op in (">=", ">") else self.col < bound
+        return _COMPARISONS[op](self.col, self._scalar(value))
+
+    def between(self, low: str, high: str) -> Optional[ColumnElement]:
+        conditions = []
+        if low:
+            conditions.append(self.compare(">=", low))
+        if high:
+            conditions.append(self.compare("<=", high))
+        return and_(*conditions) if conditions else None
+
+    def substring(self, pattern: str) -> ColumnElement:
+        escaped = _LIKE_SPECIAL.sub(r"\\\1", pattern).replace("*", "%")
+        target = self.col if self.kind == "text" else cast(self.col, String)
+        return target.ilike(escaped, escape="\\")
+
+
+def compile_filter(col_name: str, col, value: Any) -> Optional[ColumnElement]:
+    """
+    Predicate for one column filter value (see the syntax above), or None if
+    the value is empty or incomplete. Raises FilterError for values that do
+    not fit the column's type.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+
+    column_filter = _ColumnFilter(col_name, col)
+    lowered = " ".join(text.lower().split())
+    if lowered == "is null":
+        return col.is_(None)
+    if lowered == "is not null":
+        return col.is_not(None)
+
+    for op in _COMPARISONS:
+        if text.startswith(op):
+            operand = text[len(op) :].strip()
+            return column_filter.compare(op, operand) if operand else None
+
+    if text.startswith("="):
+        values = [part.strip() for part in text[1:].split("|") if part.strip()]
+        return column_filter.any_of(values) if values else None
+
+    if "*" in text:
+        prefix = text[:-1]
+        if column_filter.kind == "text" and text.endswith("*") and "*" not in prefix:
+            return column_filter.prefix(prefix) if prefix else None
+        return column_filter.substring(text)
+
+    if ".." in text:
+        low, high = (part.strip() for part in text.split("..", 1))
+        return column_filter.between(low, high)
+
+    return column_filter.matches(text)
+
+
+def compile_filters(filters_dict, column_map) -> List[ColumnElement]:
+    """Predicates for {col_name: filter_value}; unknown columns are ignored."""
+    conditions = []
+    for col_name, value in filters_dict.items():
+        if col_name not in column_map:
+            continue
+        condition = compile_filter(col_name, column_map[col_name], value)
+        if condition is not None:
+            conditions.append(condition)
+    return conditions
@@ -0,0 +1,141 @@
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import io
+import json
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from .config import settings
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+# Parts whose changes can alter how every sheet is read (shared text, number formats)
+_SHARED_PARTS = ("xl/styles.xml",)
+
+
+def _sheet_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Maps sheet names to their worksheet part inside the xlsx package."""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {}
+    for rel in rels.iter(f"{_PKG_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            targets[rel.get("Id")] = target.lstrip("/")
+        else:
+            targets[rel.get("Id")] = posixpath.normpath(posixpath.join("xl", target))
+    parts = {}
+    for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+        name = sheet.get("name")
+        part = targets.get(sheet.get(f"{_REL_NS}id"))
+        if name is not None and part:
+            parts[name] = part
+    return parts
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        root = ET.fromstring(archive.read("xl/sharedStrings.xml"))
+    except KeyError:
+        return []
+    return [
+        "".join(t.text or "" for t in si.iter(f"{_MAIN_NS}t"))
+        for si in root.iter(f"{_MAIN_NS}si")
+    ]
+
+
+def _shared_string_refs(sheet_xml: bytes) -> Iterator[int]:
+    for _, cell in ET.iterparse(io.BytesIO(sheet_xml)):
+        if cell.tag == f"{_MAIN_NS}c" and cell.get("t") == "s":
+            value = cell.find(f"{_MAIN_NS}v")
+            if value is not None and value.text is not None:
+                yield int(value.text)
+
+
+def sheet_signatures(data: bytes) -> Dict[str, str]:
+    """
+    Content signature per sheet of an xlsx file, computed from the package
+    without parsing cells into a DataFrame. A sheet's signature covers its
+    worksheet XML, the shared strings it references and the styles.
+    """
+    signatures = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = set(archive.namelist())
+        shared_digest = hashlib.sha256()
+        for part in _SHARED_PARTS:
+            if part in members:
+                shared_digest.update(archive.read(part))
+        strings = None
+        for sheet_name, part in _sheet_parts(archive).items():
+            sheet_xml = archive.read(part)
+            digest = shared_digest.copy()
+            digest.update(sheet_xml)
+            if b't="s"' in sheet_xml:
+                if strings is None:
+                    strings = _shared_strings(archive)
+                for index in _shared_string_refs(sheet_xml):
+                    digest.update(strings[index].encode("utf-8") + b"\0")
+            signatures[sheet_name] = digest.hexdigest()
+    return signatures
+
+
+def workbook_fingerprint(path: Path, data: bytes) -> Dict:
+    """Fingerprint of the workbook: file stat, content hash and per-sheet signatures."""
+    stat = os.stat(path)
+    try:
+        sheets = sheet_signatures(data)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        sheets = {}  # not an xlsx package: only whole-file comparison applies
+    return {
+        "path": str(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "sheets": sheets,
+    }
+
+
+def stat_matches(fingerprint: Dict, path: Path) -> bool:
+    """True if the file still has the recorded path, mtime and size (no read needed)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return (
+        fingerprint.get("path") == str(path)
+        and fingerprint.get("mtime_ns") == stat.st_mtime_ns
+        and fingerprint.get("size") == stat.st_size
+    )
+
+
+def load_import_fingerprint(db_file: Path) -> Optional[Dict]:
+    """
+    Fingerprint of the workbook last imported into db_file, or None if the
+    recorded import was for another database file (or never happened).
+    """
+    try:
+        with open(settings.import_fingerprint_file, encoding="utf-8") as f:
+            fingerprint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if fingerprint.get("db_file") != db_file.name or not db_file.exists():
+        return None
+    return fingerprint
+
+
+def save_import_fingerprint(fingerprint: Dict, db_file: Path) -> None:
+    """Records the imported workbook's fingerprint (written atomically)."""
+    content = {
+        **fingerprint,
+        "db_file": db_file.name,
+        "recorded_at": datetime.now().isoformat(),
+    }
+    target = settings.import_fingerprint_file
+    tmp_file = target.with_name(f"{target.name}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False)
+    os.replace(tmp_file, target)
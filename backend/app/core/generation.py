@@ -0,0 +1,51 @@
+from typing import Optional, Tuple
+import os
+import threading
+from .config import settings
+
+_lock = threading.Lock()
+# (mtime_ns, size) of the generation file -> its counter value
+_cached: Optional[Tuple[Tuple[int, int], int]] = None
+
+
+def _read_counter() -> int:
+    try:
+        with open(settings.data_generation_file, encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_data_generation() -> int:
+    """
+    Advances the data generation after a committed write (API updates, imports).
+    The counter lives in a file next to the database so every API process
+    and the import script share it.
+    """
+    with _lock:
+        value = _read_counter() + 1
+        target = settings.data_generation_file
+        tmp_file = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(str(value))
+        os.replace(tmp_file, target)
+    return value
+
+
+def data_generation() -> str:
+    """
+    Token that changes whenever the data may have changed (a single stat call
+    while it does not). Includes the file's mtime so two processes bumping
+    to the same value concurrently still produce a new token.
+    """
+    global _cached
+    try:
+        stat = os.stat(settings.data_generation_file)
+    except FileNotFoundError:
+        return "0"
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cached
+    if cached is None or cached[0] != signature:
+        cached = (signature, _read_counter())
+        _cached = cached
+    return f"{cached[1]}.{stat.st_mtime_ns:x}"
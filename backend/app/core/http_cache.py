@@ -0,0 +1,99 @@
+from typing import Dict
+from urllib.parse import parse_qsl
+import hashlib
+import re
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+from .generation import data_generation
+
+# Read endpoints answered from the data generation: the ETag only depends on
+# the generation, the path and the query parameters
+CACHEABLE_PATHS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"^/api/tables$",
+        r"^/api/tables/[^/]+$",
+        r"^/api/user/devices$",
+        r"^/api/devices/[^/]+/details$",
+    )
+)
+STATIC_PREFIX = "/static/"
+
+
+def compute_etag(path: str, query_string: bytes) -> str:
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    key = repr((data_generation(), path, params)).encode("utf-8")
+    # Weak: the same data may be sent compressed or not
+    return f'W/"{hashlib.sha1(key).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def api_cache_control() -> str:
+    if settings.API_CACHE_MAX_AGE_SECONDS > 0:
+        return f"private, max-age={settings.API_CACHE_MAX_AGE_SECONDS}"
+    # Browsers keep the response but revalidate it (a cheap 304) on every use
+    return "private, no-cache"
+
+
+class ConditionalGetMiddleware:
+    """
+    ETag / If-None-Match handling for the read endpoints in CACHEABLE_PATHS.
+
+    The ETag is derived from the data generation (bumped by every committed
+    write and import) and the request, so a matching If-None-Match is answered
+    304 before the route runs - no connection is taken and no query is run.
+    Static files (chip appearances) bring their own validators and only get
+    a Cache-Control header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(STATIC_PREFIX):
+            headers = {
+                "Cache-Control": f"public, max-age={settings.STATIC_CACHE_MAX_AGE_SECONDS}"
+            }
+            await self.app(scope, receive, self._add_headers(send, headers, (200, 304)))
+            return
+        if not any(pattern.match(path) for pattern in CACHEABLE_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        etag = compute_etag(path, scope["query_string"])
+        headers = {"ETag": etag, "Cache-Control": api_cache_control()}
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+        await self.app(scope, receive, self._add_headers(send, headers, (200,)))
+
+    @staticmethod
+    def _add_headers(send: Send, headers: Dict[str, str], statuses) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] in statuses
+            ):
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers[name] = value
+            await send(message)
+
+        return send_with_headers
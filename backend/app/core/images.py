@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Optional, Tuple
+from pathlib import Path
+import hashlib
+import os
+import threading
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .config import settings
+
+NO_IMAGE_FILE = "no_image.png"
+
+# (mtime_ns, size) of a source file -> its sha256
+SourceSignature = Tuple[int, int]
+
+
+def chip_appearances_dir() -> Path:
+    return settings.DATA_DIR / "chip_appearances"
+
+
+def chip_appearance_path(file_name: str) -> Optional[Path]:
+    """Path of an appearance image, or None if it is missing or outside chip_appearances/."""
+    if not file_name:
+        return None
+    base = chip_appearances_dir().resolve()
+    path = (base / file_name).resolve()
+    if not path.is_relative_to(base) or not path.is_file():
+        return None
+    return path
+
+
+class ChipImageCache:
+    """
+    Pre-scaled copies of chip appearance images.
+
+    Derived files are named after the source content hash and the target
+    size, so they are shared by every file with the same content and never
+    go stale: a replaced source simply maps to a new name. Source hashes are
+    remembered per (mtime, size) so a request only stats the source.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, Tuple[SourceSignature, str]] = {}
+
+    def source_hash(self, source: Path) -> str:
+        stat = os.stat(source)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._hashes.get(str(source))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()
+        with self._lock:
+            self._hashes[str(source)] = (signature, digest)
+        return digest
+
+    def derived(self, source: Path, max_px: int) -> Path:
+        """
+        Returns a copy of source scaled to fit max_px x max_px (never enlarged),
+        creating it on first use. Falls back to the source if it cannot be decoded.
+        """
+        stem = f"{self.source_hash(source)[:40]}_{max_px}"
+        for suffix in (".jpg", ".png"):
+            target = settings.CHIP_IMAGE_CACHE_DIR / f"{stem}{suffix}"
+            if target.exists():
+                return target
+        try:
+            with Image.open(source) as original:
+                # Photos stay JPEG (whatever the file extension); anything else becomes PNG
+                is_jpeg = original.format == "JPEG"
+                img = ImageOps.exif_transpose(original)
+                img.thumbnail((max_px, max_px), Image.Resampling.LANCZOS)
+                target = settings.CHIP_IMAGE_CACHE_DIR / (
+                    f"{stem}{'.jpg' if is_jpeg else '.png'}"
+                )
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+                if is_jpeg:
+                    if img.mode not in ("RGB", "L"):
+                        img = img.convert("RGB")
+                    img.save(tmp_file, format="JPEG", quality=90, optimize=True)
+                else:
+                    img.save(tmp_file, format="PNG", optimize=True)
+                os.replace(tmp_file, target)
+        except (UnidentifiedImageError, OSError) as e:
+            print(f"Failed to scale image '{source}': {e}")
+            return source
+        return target
+
+    def export_image(self, source: Path) -> Path:
+        """Image embedded in spec sheets (CHIP_IMAGE_EXPORT_PX)."""
+        return self.derived(source, settings.CHIP_IMAGE_EXPORT_PX)
+
+    def thumbnail(self, source: Path) -> Path:
+        """Image shown in the UI (CHIP_IMAGE_THUMBNAIL_PX)."""
+        return self.derived(source, settings.CHIP_IMAGE_THUMBNAIL_PX)
+
+    def warm(self, file_names: Iterable[str]) -> int:
+        """Builds the export and thumbnail images for the given appearance files."""
+        count = 0
+        for file_name in {*file_names, NO_IMAGE_FILE}:
+            source = chip_appearance_path(file_name)
+            if source is None:
+                continue
+            self.export_image(source)
+            self.thumbnail(source)
+            count += 1
+        return count
+
+
+# Create a singleton instance
+chip_image_cache = ChipImageCache()
@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional
+import json
+
+# import_data.py --progress-json writes one line per stage, e.g.
+# @progress {"percent": 45.0, "message": "Loading rows"}
+# The import job reads them instead of the script's human-readable output.
+PROGRESS_PREFIX = "@progress "
+
+
+def format_progress(
+    percent: float,
+    message: str,
+    done: Optional[int] = None,
+    total: Optional[int] = None,
+) -> str:
+    progress: Dict[str, Any] = {"percent": percent, "message": message}
+    if done is not None:
+        progress["done"] = done
+    if total is not None:
+        progress["total"] = total
+    return PROGRESS_PREFIX + json.dumps(progress, ensure_ascii=False)
+
+
+def parse_progress(line: str) -> Optional[Dict[str, Any]]:
+    """
+    The progress carried by a line, or None for other output and for lines
+    that cannot be read (a malformed line never fails the import).
+    """
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        progress = json.loads(line[len(PROGRESS_PREFIX) :])
+    except ValueError:
+        return None
+    if (
+        not isinstance(progress, dict)
+        or not isinstance(progress.get("percent"), (int, float))
+        or not isinstance(progress.get("message"), str)
+        or not all(
+            isinstance(progress.get(key), (int, type(None)))
+            for key in ("done", "total")
+        )
+    ):
+        return None
+    return progress
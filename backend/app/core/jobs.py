@@ -0,0 +1,330 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import json
+import threading
+import time
+import traceback
+import uuid
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    desc,
+    func,
+    select,
+)
+from sqlalchemy.engine import Engine
+from fastapi import HTTPException
+from .config import settings
+from .database import create_db_engine, sqlite_url
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Job state lives in its own database: the master database is replaced by
+# every import, jobs (imports included) must outlive it
+jobs_metadata = MetaData()
+jobs_table = Table(
+    "jobs",
+    jobs_metadata,
+    Column("id", String, primary_key=True),
+    Column("kind", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("params", Text),  # JSON
+    Column("progress", Float),  # percent
+    Column("rows_done", Integer),
+    Column("rows_total", Integer),
+    Column("message", String),
+    Column("error", Text),
+    Column("artifact", String),  # file name under JOB_ARTIFACT_DIR
+    Column("download_name", String),
+    Column("media_type", String),
+    Column("created_at", String),
+    Column("started_at", String),
+    Column("finished_at", String),
+    Index("ix_jobs_created_at", "created_at"),
+    Index("ix_jobs_status", "status"),
+)
+
+
+class JobQueueFullError(Exception):
+    """Raised when JOB_MAX_QUEUED jobs are already waiting for a worker."""
+
+
+class JobConflictError(Exception):
+    """Raised when an exclusive job kind already has a queued or running job."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"Job {job['id']} is already {job['status']}")
+        self.job = job
+
+
+class JobContext:
+    """Handle passed to a job runner to report progress and write its artifact."""
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self._manager = manager
+        self.job_id = job_id
+        self.keep_artifact_on_failure = False
+        self._last_update = 0.0
+
+    def progress(
+        self,
+        done: int,
+        total: Optional[int] = None,
+        message: Optional[str] = None,
+        percent: Optional[float] = None,
+    ) -> None:
+        """
+        Records progress (rows or items done out of total). Writes are throttled
+        to one per JOB_PROGRESS_INTERVAL_SECONDS; the final state is always written.
+        """
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if (
+            not finished
+            and now - self._last_update < settings.JOB_PROGRESS_INTERVAL_SECONDS
+        ):
+            return
+        self._last_update = now
+        values: Dict[str, Any] = {"rows_done": done}
+        if total is not None:
+            values["rows_total"] = total
+            if percent is None and total > 0:
+                percent = min(done / total, 1.0) * 100
+        if percent is not None:
+            values["progress"] = round(percent, 1)
+        if message is not None:
+            values["message"] = message
+        self._manager._update(self.job_id, **values)
+
+    def artifact(
+        self, download_name: str, media_type: str, keep_on_failure: bool = False
+    ) -> Path:
+        """
+        Path the runner writes its result file to. The file is deleted if the
+        job fails, unless keep_on_failure is set (e.g. a log).
+        """
+        path = settings.JOB_ARTIFACT_DIR / f"{self.job_id}{Path(download_name).suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_artifact_on_failure = keep_on_failure
+        self._manager._update(
+            self.job_id,
+            artifact=path.name,
+            download_name=download_name,
+            media_type=media_type,
+        )
+        return path
+
+
+# A runner receives the context and the submitted parameters and returns a
+# final message (or None)
+JobRunner = Callable[[JobContext, Dict[str, Any]], Optional[str]]
+
+
+class JobManager:
+    """
+    In-process background jobs (large exports, imports) on a bounded worker pool.
+
+    Job state (status, progress, row counts, errors) is persisted in
+    JOBS_DB_FILE so it can be polled from any request and survives restarts;
+    jobs interrupted by a restart are marked failed. Result files are kept
+    under JOB_ARTIFACT_DIR for JOB_RETENTION_HOURS.
+    """
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._runners: Dict[str, JobRunner] = {}
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, kind: str, runner: JobRunner) -> None:
+        self._runners[kind] = runner
+
+    def _get_engine(self) -> Engine:
+        with self._lock:
+            if self._engine is None:
+                settings.JOBS_DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+                engine = create_db_engine(sqlite_url(settings.JOBS_DB_FILE))
+                jobs_metadata.create_all(engine)
+                with engine.begin() as conn:
+                    conn.execute(
+                        jobs_table.update()
+                        .where(jobs_table.c.status.in_(ACTIVE_STATUSES))
+                        .values(
+                            status="failed",
+                            error="Interrupted by a server restart",
+                            finished_at=datetime.now().isoformat(),
+                        )
+                    )
+                self._engine = engine
+            return self._engine
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+            return self._executor
+
+    def _update(self, job_id: str, **values) -> None:
+        with self._get_engine().begin() as conn:
+            conn.execute(
+                jobs_table.update().where(jobs_table.c.id == job_id).values(**values)
+            )
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        job = dict(row._mapping)
+        job["params"] = json.loads(job["params"]) if job["params"] else {}
+        return job
+
+    def submit(
+        self, kind: str, params: Dict[str, Any], exclusive: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Queues a job and returns its initial state. An exclusive job is refused
+        (JobConflictError) while another job of its kind is queued or running.
+        """
+        if kind not in self._runners:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        with self._get_engine().begin() as conn:
+            # Take the write lock first so the checks and the insert are atomic
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            if exclusive:
+                active = conn.execute(
+                    select(jobs_table).where(
+                        jobs_table.c.kind == kind,
+                        jobs_table.c.status.in_(ACTIVE_STATUSES),
+                    )
+                ).first()
+                if active is not None:
+                    raise JobConflictError(self._to_dict(active))
+            queued = conn.execute(
+                select(func.count())
+                .select_from(jobs_table)
+                .where(jobs_table.c.status == "queued")
+            ).scalar_one()
+            if queued >= self.max_queued:
+                raise JobQueueFullError(f"{queued} jobs are already waiting")
+            conn.execute(
+                jobs_table.insert().values(
+                    id=job_id,
+                    kind=kind,
+                    status="queued",
+                    params=json.dumps(params, ensure_ascii=False),
+                    progress=0.0,
+                    created_at=datetime.now().isoformat(),
+                )
+            )
+        self._get_executor().submit(self._run, job_id, kind, params)
+        job = self.get(job_id)
+        assert job is not None
+        return job
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]) -> None:
+        self._update(job_id, status="running", started_at=datetime.now().isoformat())
+        context = JobContext(self, job_id)
+        try:
+            message = self._runners[kind](context, params)
+        except HTTPException as he:
+            # Expected failures (e.g. devices not found) carry their own message
+            self._fail(job_id, context, str(he.detail))
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self._fail(job_id, context, str(e) or type(e).__name__)
+            return
+        values: Dict[str, Any] = {
+            "status": "succeeded",
+            "progress": 100.0,
+            "finished_at": datetime.now().isoformat(),
+        }
+        if message is not None:
+            values["message"] = message
+        self._update(job_id, **values)
+
+    def _fail(self, job_id: str, context: JobContext, error: str) -> None:
+        values: Dict[str, Any] = {
+            "status": "failed",
+            "error": error,
+            "finished_at": datetime.now().isoformat(),
+        }
+        job = self.get(job_id)
+        if job is not None and job["artifact"] and not context.keep_artifact_on_failure:
+            (settings.JOB_ARTIFACT_DIR / job["artifact"]).unlink(missing_ok=True)
+            values["artifact"] = None
+        self._update(job_id, **values)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._get_engine().connect() as conn:
+            row = conn.execute(
+                select(jobs_table).where(jobs_table.c.id == job_id)
+            ).first()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, limit: int = 50, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        stmt = select(jobs_table).order_by(desc(jobs_table.c.created_at)).limit(limit)
+        if kind is not None:
+            stmt = stmt.where(jobs_table.c.kind == kind)
+        with self._get_engine().connect() as conn:
+            return [self._to_dict(row) for row in conn.execute(stmt)]
+
+    def active(self, kind: str) -> List[Dict[str, Any]]:
+        """Queued or running jobs of a kind."""
+        stmt = select(jobs_table).where(
+            jobs_table.c.kind == kind, jobs_table.c.status.in_(ACTIVE_STATUSES)
+        )
+        with self._get_engine().connect() as conn:
+            return [self._to_dict(row) for row in conn.execute(stmt)]
+
+    def artifact_path(self, job: Dict[str, Any]) -> Optional[Path]:
+        """Result file of a finished job (or the log of a failed one), if it still exists."""
+        if job["status"] not in FINISHED_STATUSES or not job["artifact"]:
+            return None
+        path = settings.JOB_ARTIFACT_DIR / job["artifact"]
+        return path if path.is_file() else None
+
+    def purge_expired(self) -> int:
+        """Deletes finished jobs (and their files) older than JOB_RETENTION_HOURS."""
+        cutoff = (
+            datetime.now() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+        ).isoformat()
+        condition = (jobs_table.c.status.in_(FINISHED_STATUSES)) & (
+            jobs_table.c.finished_at < cutoff
+        )
+        with self._get_engine().begin() as conn:
+            expired = (
+                conn.execute(select(jobs_table.c.artifact).where(condition))
+                .scalars()
+                .all()
+            )
+            for artifact in expired:
+                if artifact:
+                    (settings.JOB_ARTIFACT_DIR / artifact).unlink(missing_ok=True)
+            return conn.execute(jobs_table.delete().where(condition)).rowcount
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            engine, self._engine = self._engine, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if engine is not None:
+            engine.dispose()
+
+
+# Create a singleton instance
+job_manager = JobManager(settings.JOB_WORKERS, settings.JOB_MAX_QUEUED)
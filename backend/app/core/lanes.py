@@ -0,0 +1,147 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+import asyncio
+import functools
+import threading
+from fastapi import HTTPException
+from .config import settings
+
+_END = object()
+
+
+class LaneBusyError(Exception):
+    """Raised when a lane already has max_queue calls waiting for a worker."""
+
+
+class ExecutorLane:
+    """
+    A bounded thread pool for one class of work.
+
+    At most max_workers calls of the lane run at once; up to max_queue more
+    wait for a worker and further calls are rejected (503) instead of piling
+    up. Routes run in their lane instead of the server's shared thread pool,
+    so slow exports cannot hold the threads that cheap list calls need.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.name}-lane",
+                )
+            return self._executor
+
+    def _call(self, func: Callable[..., Any]) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+
+    def _forget_cancelled(self, future: Future) -> None:
+        if future.cancelled():  # never started (request cancelled while queued)
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func: Callable[..., Any], *args, admit: bool = True, **kwargs):
+        """
+        Runs func in the lane and returns its result.
+        With admit=False the call skips the queue limit (continuation of admitted work).
+        """
+        with self._lock:
+            if admit and self._queued >= self.max_queue:
+                self.rejected += 1
+                raise LaneBusyError(
+                    f"The {self.name} lane is busy ({self._queued} requests waiting)"
+                )
+            self._queued += 1
+        call = functools.partial(func, *args, **kwargs)
+        try:
+            future = self._get_executor().submit(self._call, call)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._forget_cancelled)
+        return await asyncio.wrap_future(future)
+
+    async def iterate(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """Advances a blocking iterator (e.g. a streamed export) in the lane."""
+        try:
+            while True:
+                chunk = await self.run(next, iterator, _END, admit=False)
+                if chunk is _END:
+                    break
+                yield chunk
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    await self.run(close, admit=False)
+                except ValueError:
+                    pass  # still executing in a worker; closed once collected
+
+    def route(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Turns a sync route into an async one that runs in this lane.
+        A full lane answers 503 with Retry-After.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await self.run(func, *args, **kwargs)
+            except LaneBusyError as e:
+                raise HTTPException(
+                    status_code=503, detail=str(e), headers={"Retry-After": "1"}
+                )
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Create singleton instances
+interactive_lane = ExecutorLane(
+    "interactive", settings.INTERACTIVE_LANE_WORKERS, settings.INTERACTIVE_LANE_QUEUE
+)
+heavy_lane = ExecutorLane(
+    "heavy", settings.HEAVY_LANE_WORKERS, settings.HEAVY_LANE_QUEUE
+)
+LANES = (interactive_lane, heavy_lane)
+
+
+def shutdown_lanes() -> None:
+    for lane in LANES:
+        lane.shutdown()
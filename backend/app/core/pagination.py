@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import and_, false, or_
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import ColumnElement, Select
+from .responses import rows_payload
+
+# (result key, column expression) pairs: the sort column first, then the primary key
+KeysetKeys = Sequence[Tuple[str, ColumnElement]]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(sort_token: str, direction: str, values: Sequence[Any]) -> str:
+    payload = {
+        "s": sort_token,
+        "d": direction,
+        "v": [_encode_value(v) for v in values],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_token: str, key_count: int) -> Dict[str, Any]:
+    """Decodes an opaque cursor token, rejecting tokens issued for another sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+        values = [_decode_value(v) for v in payload["v"]]
+        direction = payload["d"]
+        token = payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if token != sort_token or direction not in ("next", "prev"):
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor does not match the requested sort order.",
+        )
+    if len(values) != key_count:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return {"direction": direction, "values": values}
+
+
+def _seek_condition(
+    keys: List[Tuple[ColumnElement, Any]], forward: bool
+) -> ColumnElement:
+    """
+    Builds the row-value comparison (k1, k2, ...) > (v1, v2, ...) (or < when
+    forward is False), treating NULL as the smallest value like SQLite does.
+    """
+    col, value = keys[0]
+    if forward:
+        beyond = col.is_not(None) if value is None else col > value
+    else:
+        beyond = false() if value is None else or_(col < value, col.is_(None))
+    if len(keys) == 1:
+        return beyond
+    equal = col.is_(None) if value is None else col == value
+    return or_(beyond, and_(equal, _seek_condition(keys[1:], forward)))
+
+
+def paginate_by_cursor(
+    conn: Connection,
+    stmt: Select,
+    keys: KeysetKeys,
+    descending: bool,
+    limit: int,
+    cursor: Optional[str],
+    sort_token: str,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fetches one page of an unordered SELECT using keyset pagination.
+    Returns the rows (see rows_payload) plus opaque next/prev cursors
+    (None at either end).
+    """
+    state = decode_cursor(cursor, sort_token, len(keys)) if cursor else None
+    backwards = state is not None and state["direction"] == "prev"
+    forward = descending == backwards
+
+    columns = [col for _, col in keys]
+    if state is not None:
+        stmt = stmt.where(_seek_condition(list(zip(columns, state["values"])), forward))
+    order = [col.asc() if forward else col.desc() for col in columns]
+    result = conn.execute(stmt.order_by(*order).limit(limit + 1))
+    rows = result.all()
+
+    has_extra = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows = list(reversed(rows))
+
+    has_next = has_extra if not backwards else state is not None
+    has_prev = has_extra if backwards else state is not None
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(
+            sort_token, "next", [rows[-1]._mapping[name] for name, _ in keys]
+        )
+    if rows and has_prev:
+        prev_cursor = encode_cursor(
+            sort_token, "prev", [rows[0]._mapping[name] for name, _ in keys]
+        )
+
+    return {
+        **rows_payload(result.keys(), rows, columnar),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "has_more": has_next,
+    }
@@ -0,0 +1,62 @@
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import Table
+from .config import settings
+
+FIELD_SETS = ("all", "summary")
+# Kept in summary mode: the grid's optimistic lock reads it
+SUMMARY_ALWAYS = ("更新日",)
+
+
+def page_limit(limit: int) -> int:
+    """Caps a requested page size at MAX_PAGE_SIZE."""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1.")
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+
+def parse_columns(
+    columns: Optional[str], available: Iterable[str], required: Iterable[Optional[str]]
+) -> Optional[List[str]]:
+    """
+    Column names of a columns=a,b,c projection (None when not given), with the
+    required key columns appended. Unknown names are a 400.
+    """
+    if columns is None:
+        return None
+    available = list(available)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys([*names, *(name for name in required if name)]))
+
+
+def table_projection(
+    table: Table,
+    columns: Optional[str],
+    fields: str,
+    required: Iterable[Optional[str]],
+) -> Optional[List[str]]:
+    """
+    Columns to select from a table for columns= or fields=summary (None = all).
+    The summary keeps the table's column order.
+    """
+    if fields not in FIELD_SETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported fields '{fields}'. Use one of: {', '.join(FIELD_SETS)}.",
+        )
+    if fields == "all":
+        return parse_columns(columns, table.columns.keys(), required)
+    if columns is not None:
+        raise HTTPException(
+            status_code=400, detail="Use either columns or fields=summary, not both."
+        )
+    summary = table.info.get("summary_columns")
+    if summary is None:
+        return None
+    wanted = {*summary, *SUMMARY_ALWAYS, *(name for name in required if name)}
+    return [name for name in table.columns.keys() if name in wanted]
@@ -0,0 +1,49 @@
+from typing import Any, Dict, Iterable, List, Optional
+import re
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.compiler import SQLCompiler
+
+# "SCAN t" reads the whole table; "SCAN t USING INDEX ..." walks an index in
+# order (listings with LIMIT) and virtual tables (FTS) are searched internally
+_FULL_SCAN = re.compile(r"^SCAN (\S+)(?!.*\b(?:USING|VIRTUAL TABLE)\b)")
+_TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR (.+)")
+
+
+def explain_query_plan(
+    conn: Connection,
+    stmt: ClauseElement,
+    params: Optional[Dict[str, Any]] = None,
+    allowed_scans: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Runs EXPLAIN QUERY PLAN for a statement with the parameters it is executed with.
+    Full scans of tables not listed in allowed_scans are reported as regressions.
+    """
+    if params:
+        stmt = stmt.params(**params)
+    # Expanding (IN-list) parameters are rendered as they are at execution
+    compiled = stmt.compile(dialect=conn.dialect)
+    assert isinstance(compiled, SQLCompiler)
+    expanded = compiled.construct_expanded_state()
+    sql = expanded.statement
+    rows = conn.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {sql}", tuple(expanded.positional_parameters)
+    ).all()
+    plan: List[Dict[str, Any]] = []
+    full_scans = []
+    temp_sorts = []
+    for node_id, parent, _, detail in rows:
+        plan.append({"id": node_id, "parent": parent, "detail": detail})
+        if match := _FULL_SCAN.match(detail):
+            full_scans.append(match.group(1))
+        elif match := _TEMP_SORT.match(detail):
+            temp_sorts.append(match.group(1))
+    allowed = set(allowed_scans)
+    return {
+        "sql": sql,
+        "plan": plan,
+        "full_scans": full_scans,
+        "temp_sorts": temp_sorts,
+        "unexpected_scans": [name for name in full_scans if name not in allowed],
+    }
@@ -0,0 +1,73 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import json
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Row
+
+orjson: Optional[ModuleType]
+try:
+    import orjson  # type: ignore[no-redef, import-not-found, unused-ignore]
+except ImportError:  # optional speed-up: uv sync --extra speedups
+    orjson = None
+
+ROW_FORMATS = ("records", "columnar")
+
+
+def _default(value: Any) -> Any:
+    """Values neither encoder handles natively (mirrors FastAPI's jsonable_encoder)."""
+    if isinstance(value, Decimal):
+        exponent = value.as_tuple().exponent  # a letter for NaN/Infinity
+        return (
+            int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+        )
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Dates, datetimes and non-ASCII column names are encoded natively
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when installed, skipping jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def check_row_format(format: str) -> bool:
+    """Validates the format query parameter; True for the columnar layout."""
+    if format not in ROW_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Use one of: {', '.join(ROW_FORMATS)}.",
+        )
+    return format == "columnar"
+
+
+def rows_payload(
+    columns: Iterable[str], rows: Sequence[Row], columnar: bool
+) -> Dict[str, Any]:
+    """
+    Page rows as {"data": [{column: value}, ...]} or, in the columnar layout,
+    {"columns": [...], "rows": [[...], ...]} without building a dict per row.
+    """
+    if columnar:
+        return {"columns": list(columns), "rows": [tuple(row) for row in rows]}
+    data: List[Dict[str, Any]] = [dict(row._mapping) for row in rows]
+    return {"data": data}
@@ -0,0 +1,228 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from sqlalchemy import MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import NoSuchTableError
+from .config import settings
+from .generation import bump_data_generation
+from ..schema import metadata as schema_metadata
+
+StampSignature = Optional[Tuple[int, int]]
+
+# Full-text search index tables (see core/search.py) are named "<table>_fts".
+# FTS5 also creates shadow tables "<table>_fts_<suffix>" that must stay hidden.
+SEARCH_INDEX_SUFFIX = "_fts"
+_FTS_SHADOW_PATTERN = re.compile(r"_fts_(data|idx|content|docsize|config)$")
+# Trigram indexes answer substring queries like the LIKE search they replace;
+# indexes built with another tokenizer (older imports) are not used.
+SEARCH_INDEX_TOKENIZER = "trigram"
+
+
+def search_index_name(table_name: str) -> str:
+    return f"{table_name}{SEARCH_INDEX_SUFFIX}"
+
+
+def is_search_index_table(table_name: str) -> bool:
+    return table_name.endswith(SEARCH_INDEX_SUFFIX) or bool(
+        _FTS_SHADOW_PATTERN.search(table_name)
+    )
+
+
+def current_search_indexes(conn: Connection) -> FrozenSet[str]:
+    """Search index tables built with SEARCH_INDEX_TOKENIZER."""
+    rows = conn.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table'"
+    ).all()
+    return frozenset(
+        name
+        for name, sql in rows
+        if name.endswith(SEARCH_INDEX_SUFFIX)
+        and f"tokenize='{SEARCH_INDEX_TOKENIZER}'" in (sql or "")
+    )
+
+
+def _stamp_signature() -> StampSignature:
+    """Cheap change detector for the stamp file (no file read, single stat call)."""
+    try:
+        stat = os.stat(settings.schema_stamp_file)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_schema_stamp() -> Dict:
+    """Returns the content of the schema stamp file, or an empty dict if missing."""
+    try:
+        with open(settings.schema_stamp_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def generation_db_file(generation: int) -> Path:
+    """Database file built by the import run with the given generation (master.<n>.db)."""
+    db_file = settings.DB_FILE
+    return db_file.with_name(f"{db_file.stem}.{generation}{db_file.suffix}")
+
+
+def published_db_file(stamp: Dict) -> Path:
+    """Database file the stamp points to (DB_FILE before the first shadow import)."""
+    name = stamp.get("db_file")
+    return settings.DB_FILE.with_name(name) if name else settings.DB_FILE
+
+
+def write_schema_stamp(
+    changed_tables: Optional[Iterable[str]] = None,
+    generation: Optional[int] = None,
+) -> int:
+    """
+    Bumps the schema version stamp. Called by the import script after the
+    database has been rebuilt so running API processes drop their cached schema.
+    After an incremental import, pass the tables whose rows changed instead:
+    only the data version is bumped and the cached schema is kept.
+    Passing a generation publishes generation_db_file(generation) as the live
+    database; API processes switch to it before their next request.
+    """
+    stamp = read_schema_stamp()
+    version = int(stamp.get("schema_version", 0))
+    if changed_tables is None:
+        version += 1
+    content = {
+        "schema_version": version,
+        "data_version": int(stamp.get("data_version", 0)) + 1,
+        "changed_tables": sorted(changed_tables or []),
+        "updated_at": datetime.now().isoformat(),
+    }
+    if generation is not None:
+        content["generation"] = generation
+        content["db_file"] = generation_db_file(generation).name
+    elif "db_file" in stamp:
+        content["generation"] = stamp.get("generation", 0)
+        content["db_file"] = stamp["db_file"]
+    stamp_file = settings.schema_stamp_file
+    tmp_file = stamp_file.with_name(f"{stamp_file.name}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(content, f)
+    os.replace(tmp_file, stamp_file)
+    bump_data_generation()
+    return version
+
+
+class SchemaRegistry:
+    """
+    In-process cache of the database schema.
+
+    Tables defined in app.schema are used as-is when their columns match the
+    database; any other table is reflected once. The cache is dropped when the
+    import script bumps the schema stamp; a data-only stamp (incremental import)
+    just notifies the data change listeners.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._tables: Optional[Dict[str, Table]] = None
+        self._search_indexes: FrozenSet[str] = frozenset()
+        self._signature: StampSignature = _stamp_signature()
+        self._stamp: Dict = read_schema_stamp()
+        self._listeners: List[Callable[[], None]] = []
+        self._data_listeners: List[Callable[[List[str]], None]] = []
+
+    @property
+    def stamp(self) -> Dict:
+        """Stamp content as of the last refresh_if_stale()."""
+        return self._stamp
+
+    def add_invalidation_listener(self, callback: Callable[[], None]) -> None:
+        """Registers a callback run whenever the cached schema is dropped."""
+        self._listeners.append(callback)
+
+    def add_data_change_listener(self, callback: Callable[[List[str]], None]) -> None:
+        """Registers a callback run with the changed table names after an incremental import."""
+        self._data_listeners.append(callback)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tables = None
+        for callback in self._listeners:
+            callback()
+
+    def refresh_if_stale(self) -> bool:
+        """Drops the cached schema if the stamp changed. Returns True if it did."""
+        signature = _stamp_signature()
+        if signature == self._signature:
+            return False
+        with self._refresh_lock:
+            if signature == self._signature:
+                return False
+            previous, stamp = self._stamp, read_schema_stamp()
+            self._stamp = stamp
+            self._signature = signature
+        if stamp.get("schema_version") == previous.get("schema_version") and (
+            stamp.get("data_version", 0) == previous.get("data_version", 0) + 1
+        ):
+            # Exactly one data-only import since the last check
+            for callback in self._data_listeners:
+                callback(stamp.get("changed_tables", []))
+            return False
+        self.invalidate()
+        return True
+
+    def _load(self, conn: Connection) -> Dict[str, Table]:
+        inspector = inspect(conn)
+        reflected_metadata = MetaData()
+        tables: Dict[str, Table] = {}
+        for table_name in inspector.get_table_names():
+            if is_search_index_table(table_name):
+                continue
+            declared = schema_metadata.tables.get(table_name)
+            db_columns = [col["name"] for col in inspector.get_columns(table_name)]
+            if declared is not None and db_columns == [
+                c.name for c in declared.columns
+            ]:
+                tables[table_name] = declared
+            else:
+                tables[table_name] = Table(
+                    table_name, reflected_metadata, autoload_with=conn
+                )
+        self._search_indexes = current_search_indexes(conn)
+        return tables
+
+    def _ensure_loaded(self, conn: Connection) -> Dict[str, Table]:
+        tables = self._tables
+        if tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self._load(conn)
+                tables = self._tables
+        return tables
+
+    def table_names(self, conn: Connection) -> List[str]:
+        """Names of user-facing tables (internal bookkeeping tables are hidden)."""
+        return [
+            name
+            for name, table in self._ensure_loaded(conn).items()
+            if not table.info.get("internal")
+        ]
+
+    def get_table(self, conn: Connection, table_name: str) -> Optional[Table]:
+        return self._ensure_loaded(conn).get(table_name)
+
+    def has_search_index(self, conn: Connection, table_name: str) -> bool:
+        self._ensure_loaded(conn)
+        return search_index_name(table_name) in self._search_indexes
+
+    def require_table(self, conn: Connection, table_name: str) -> Table:
+        table = self.get_table(conn, table_name)
+        if table is None:
+            raise NoSuchTableError(table_name)
+        return table
+
+
+# Create a singleton instance
+schema_registry = SchemaRegistry()
@@ -0,0 +1,188 @@
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import String, Table, cast, column, literal_column, or_, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import ColumnElement, Select
+from .schema_registry import (
+    SEARCH_INDEX_SUFFIX,
+    SEARCH_INDEX_TOKENIZER,
+    schema_registry,
+    search_index_name,
+)
+
+# The trigram tokenizer indexes every 3-character run (Japanese text has no
+# word boundaries), so a MATCH finds any substring of at least 3 characters.
+SEARCH_INDEX_MIN_TERM_LENGTH = 3
+_TRIGGER_SUFFIXES = ("ai", "ad", "au")
+# LIKE wildcards: the substring search treated them as patterns
+_LIKE_WILDCARDS = ("%", "_")
+
+
+def is_searchable(table_name: str) -> bool:
+    """Returns True for tables that should carry a full-text search index."""
+    return table_name.startswith("MT_") or table_name in ("AuditLog", "device_view")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _rowid(source: Table) -> ColumnElement:
+    return literal_column(f"{_quote(source.name)}.rowid")
+
+
+def create_search_index(conn: Connection, source: Table) -> None:
+    """
+    Creates an external-content FTS5 index for the table, keeps it in sync with
+    triggers and (re)builds it from the current table content.
+    """
+    index_name = _quote(search_index_name(source.name))
+    source_name = _quote(source.name)
+    columns = [_quote(col.name) for col in source.columns]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index_name} USING fts5("
+        f"{column_list}, content={source_name}, content_rowid='rowid', "
+        f"tokenize='{SEARCH_INDEX_TOKENIZER}')"
+    )
+    trigger_prefix = search_index_name(source.name)
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {_quote(trigger_prefix + '_ai')} "
+        f"AFTER INSERT ON {source_name} BEGIN "
+        f"INSERT INTO {index_name}(rowid, {column_list}) "
+        f"VALUES (new.rowid, {new_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {_quote(trigger_prefix + '_ad')} "
+        f"AFTER DELETE ON {source_name} BEGIN "
+        f"INSERT INTO {index_name}({index_name}, rowid, {column_list}) "
+        f"VALUES ('delete', old.rowid, {old_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {_quote(trigger_prefix + '_au')} "
+        f"AFTER UPDATE ON {source_name} BEGIN "
+        f"INSERT INTO {index_name}({index_name}, rowid, {column_list}) "
+        f"VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {index_name}(rowid, {column_list}) "
+        f"VALUES (new.rowid, {new_values}); END"
+    )
+    conn.exec_driver_sql(f"INSERT INTO {index_name}({index_name}) VALUES ('rebuild')")
+
+
+def create_search_indexes(conn: Connection, tables: Iterable[Table]) -> List[str]:
+    """Creates search indexes for every searchable table. Returns the indexed names."""
+    indexed = []
+    for source in tables:
+        if is_searchable(source.name):
+            create_search_index(conn, source)
+            indexed.append(source.name)
+    return indexed
+
+
+def drop_search_indexes(conn: Connection) -> None:
+    """Drops every FTS index and its sync triggers (used before a full re-import)."""
+    rows = conn.exec_driver_sql(
+        "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    ).all()
+    for object_type, name in rows:
+        if object_type == "trigger" and any(
+            name.endswith(f"_fts_{suffix}") for suffix in _TRIGGER_SUFFIXES
+        ):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {_quote(name)}")
+    for object_type, name in rows:
+        if object_type == "table" and name.endswith(SEARCH_INDEX_SUFFIX):
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_quote(name)}")
+
+
+def build_match_query(term: str, columns: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Converts a search box term into an FTS5 query matching it as a substring
+    (case-insensitive), like the LIKE search. Returns None if the index cannot
+    answer it: terms shorter than a trigram, or containing LIKE wildcards.
+    """
+    if len(term) < SEARCH_INDEX_MIN_TERM_LENGTH or any(
+        wildcard in term for wildcard in _LIKE_WILDCARDS
+    ):
+        return None
+    query = _quote(term)
+    if columns:
+        column_filter = " ".join(_quote(name) for name in columns)
+        query = f"{{{column_filter}}} : ({query})"
+    return query
+
+
+def _like_condition(columns: Iterable, term: str) -> ColumnElement:
+    return or_(*[cast(col, String).ilike(f"%{term}%") for col in columns])
+
+
+def _match_subquery(source: Table, match_query: str):
+    index_name = search_index_name(source.name)
+    index = table(index_name, column("rowid"), column("rank"))
+    return select(index.c.rowid, index.c.rank).where(
+        literal_column(_quote(index_name)).op("MATCH")(match_query)
+    )
+
+
+def search_condition(
+    conn: Connection, source: Table, term: str, columns: Optional[List] = None
+) -> ColumnElement:
+    """
+    Returns a WHERE condition matching the term in the given columns of the table
+    (all columns by default). Served from the FTS index when the table has one
+    and the term is long enough, otherwise falls back to a LIKE substring match.
+    """
+    target_columns = list(columns) if columns is not None else list(source.columns)
+    if schema_registry.has_search_index(conn, source.name):
+        column_names = None if columns is None else [c.name for c in target_columns]
+        match_query = build_match_query(term, column_names)
+        if match_query is not None:
+            matches = _match_subquery(source, match_query).subquery()
+            return _rowid(source).in_(select(matches.c.rowid))
+    return _like_condition(target_columns, term)
+
+
+def apply_search(
+    conn: Connection, stmt: Select, source: Table, term: str, rank: bool = False
+) -> Select:
+    """
+    Applies the global search to a single-table SELECT. With rank=True, results
+    from the FTS index are ordered by relevance (bm25).
+    """
+    if rank and schema_registry.has_search_index(conn, source.name):
+        match_query = build_match_query(term)
+        if match_query is not None:
+            matches = _match_subquery(source, match_query).subquery()
+            return stmt.join_from(
+                source, matches, matches.c.rowid == _rowid(source)
+            ).order_by(matches.c.rank)
+    return stmt.where(search_condition(conn, source, term))
+
+
+def compare_with_like(conn: Connection, source: Table, term: str) -> Dict[str, Any]:
+    """
+    Runs the global search for a term through search_condition and through the
+    plain LIKE substring search, and counts the rows only one of them found.
+    """
+    rowid = _rowid(source)
+    like_rows = set(
+        conn.execute(
+            select(rowid)
+            .select_from(source)
+            .where(_like_condition(source.columns, term))
+        ).scalars()
+    )
+    search_rows = set(
+        conn.execute(
+            select(rowid)
+            .select_from(source)
+            .where(search_condition(conn, source, term))
+        ).scalars()
+    )
+    return {
+        "like": len(like_rows),
+        "search": len(search_rows),
+        "missing": len(like_rows - search_rows),
+        "extra": len(search_rows - like_rows),
+    }
@@ -0,0 +1,588 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from io import BytesIO, RawIOBase
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import zipfile
+import openpyxl
+from openpyxl.drawing.image import Image
+from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, OneCellAnchor
+from openpyxl.drawing.xdr import XDRPositiveSize2D
+from openpyxl.styles import Alignment
+from openpyxl.utils.units import pixels_to_EMU
+from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from .config import settings
+from .images import NO_IMAGE_FILE, chip_appearance_path, chip_image_cache
+
+TemplateSignature = Tuple[int, int]
+
+# Keys per IN (...) list when fetching many spec sheets at once
+FETCH_CHUNK_SIZE = 500
+
+_DEVICE_QUERY = """
+    SELECT
+        d.type, d.sheet_no, d.barrier, d.passivation, d.status,
+        s.sheet_name, s.sheet_revision, s.vdss_V, s.vgss_V, s.idss_A, s.esd_display, s.maskset,
+        m.chip_x_mm, m.chip_y_mm, m.dicing_line_um, m.pad_x_gate_um, m.pad_y_gate_um, m.pad_x_source_um, m.pad_y_source_um, m.pdpw, m.appearance,
+        tm.top_metal, tm.top_metal_thickness_um, tm.top_metal_display,
+        bm.back_metal, bm.back_metal_thickness_um, bm.back_metal_display,
+        wt.wafer_thickness_um, wt.wafer_thickness_tolerance_um, wt.wafer_thickness_display
+    FROM MT_device d
+    LEFT JOIN MT_spec_sheet s ON d.sheet_no = s.sheet_no
+    LEFT JOIN MT_maskset m ON s.maskset = m.maskset
+    LEFT JOIN MT_top_metal tm ON d.top_metal = tm.top_metal
+    LEFT JOIN MT_back_metal bm ON d.back_metal = bm.back_metal
+    LEFT JOIN MT_wafer_thickness wt ON d.wafer_thickness = wt.id
+"""
+
+
+# Set-based spec sheet queries (IN lists are expanded per FETCH_CHUNK_SIZE keys)
+# 1. Basic device info and related master data
+SPEC_SHEET_DEVICES_QUERY = text(
+    _DEVICE_QUERY + "WHERE d.type IN :device_types"
+).bindparams(bindparam("device_types", expanding=True))
+
+# 2. Electrical characteristics
+SPEC_SHEET_CHARACTERISTICS_QUERY = text("""
+    SELECT
+        sheet_no,
+        item, `+/-` as plus_minus, min, typ, max, unit,
+        bias_vgs, bias_igs, bias_vds, bias_ids, bias_vss, bias_iss, cond
+    FROM MT_elec_characteristic
+    WHERE sheet_no IN :sheet_nos
+""").bindparams(bindparam("sheet_nos", expanding=True))
+
+# 3. All device types sharing each sheet
+SPEC_SHEET_RELATED_QUERY = text("""
+    SELECT
+        d.sheet_no,
+        d.type,
+        d.top_metal as top_metal_display,
+        d.wafer_thickness as wafer_thickness_display,
+        d.back_metal as back_metal_display
+    FROM MT_device d
+    WHERE d.sheet_no IN :sheet_nos
+    ORDER BY d.type ASC
+""").bindparams(bindparam("sheet_nos", expanding=True))
+
+
+def template_path() -> str:
+    return os.path.join(str(settings.DATA_DIR), "templates", "specsheet_template.xlsx")
+
+
+class TemplateCache:
+    """
+    Keeps the spec-sheet template parsed in memory.
+
+    load_workbook() re-parses styles, merged cells and drawings on every call.
+    Instead the parsed workbook is pickled once per template version (file
+    mtime and size) and each request unpickles its own independent copy,
+    which is several times faster (openpyxl workbooks do not survive deepcopy).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature: Optional[TemplateSignature] = None
+        self._snapshot: Optional[bytes] = None
+
+    def get(self, path: str) -> Workbook:
+        """Returns a fresh, modifiable copy of the template workbook."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError("Template file not found")
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        snapshot = self._snapshot
+        if snapshot is None or self._signature != signature:
+            with self._lock:
+                if self._snapshot is None or self._signature != signature:
+                    # keep_vba=True is NOT required for .xlsx files
+                    workbook = openpyxl.load_workbook(path)
+                    self._snapshot = pickle.dumps(
+                        workbook, protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                    self._signature = signature
+                snapshot = self._snapshot
+        return pickle.loads(snapshot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._signature = None
+
+
+# Create a singleton instance
+template_cache = TemplateCache()
+
+
+def _chunked(values: List[Any], size: int = FETCH_CHUNK_SIZE) -> Iterator[List[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def fetch_spec_sheet_data_many(
+    conn: Connection, device_types: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads the spec sheet data of many devices with one query per table
+    (per FETCH_CHUNK_SIZE keys) instead of three queries per device.
+    Returns {device_type: data} in the order of device_types; unknown types are omitted.
+    """
+    unique_types = list(dict.fromkeys(device_types))
+    devices: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunked(unique_types):
+        for row in conn.execute(
+            SPEC_SHEET_DEVICES_QUERY, {"device_types": chunk}
+        ).mappings():
+            devices[row["type"]] = dict(row)
+
+    sheet_nos = list(
+        dict.fromkeys(d["sheet_no"] for d in devices.values() if d.get("sheet_no"))
+    )
+    characteristics: Dict[Any, List[Dict[str, Any]]] = {}
+    related: Dict[Any, List[Dict[str, Any]]] = {}
+    for chunk in _chunked(sheet_nos):
+        for row in conn.execute(
+            SPEC_SHEET_CHARACTERISTICS_QUERY, {"sheet_nos": chunk}
+        ).mappings():
+            char = dict(row)
+            characteristics.setdefault(char.pop("sheet_no"), []).append(char)
+        for row in conn.execute(
+            SPEC_SHEET_RELATED_QUERY, {"sheet_nos": chunk}
+        ).mappings():
+            dev = dict(row)
+            related.setdefault(dev.pop("sheet_no"), []).append(dev)
+
+    spec_data = {}
+    for device_type in unique_types:
+        device_data = devices.get(device_type)
+        if device_data is None:
+            continue
+        sheet_no = device_data.get("sheet_no")
+        spec_data[device_type] = {
+            "device": device_data,
+            "characteristics": characteristics.get(sheet_no, []) if sheet_no else [],
+            "related_devices": related.get(sheet_no, []) if sheet_no else [],
+        }
+    return spec_data
+
+
+def fetch_spec_sheet_data(
+    conn: Connection, device_type: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads everything printed on a device's spec sheet.
+    Returns None if the device does not exist.
+    """
+    return fetch_spec_sheet_data_many(conn, [device_type]).get(device_type)
+
+
+# Helper to safe get
+def get_val(data, key, default=""):
+    val = data.get(key)
+    return val if val is not None else default
+
+
+# Helper to format condition string (ported from frontend)
+def format_condition(char):
+    parts = []
+    if char.get("bias_vgs"):
+        parts.append(f"VGS={char.get('bias_vgs')}")
+    if char.get("bias_igs"):
+        parts.append(f"IGS={char.get('bias_igs')}")
+    if char.get("bias_vds"):
+        parts.append(f"VDS={char.get('bias_vds')}")
+    if char.get("bias_ids"):
+        parts.append(f"IDS={char.get('bias_ids')}")
+    if char.get("bias_vss"):
+        parts.append(f"VSS={char.get('bias_vss')}")
+    if char.get("bias_iss"):
+        parts.append(f"ISS={char.get('bias_iss')}")
+    if char.get("cond"):
+        parts.append(char.get("cond"))
+    return ", ".join(parts)
+
+
+def format_decimal_value(value, digits=2):
+    if value in (None, ""):
+        return ""
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        return str(value)
+    fmt = f"{{0:.{digits}f}}"
+    return fmt.format(number)
+
+
+def format_integer_value(value, use_grouping=False):
+    if value in (None, ""):
+        return ""
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        return str(value)
+    int_value = int(number.to_integral_value(rounding=ROUND_HALF_UP))
+    if use_grouping:
+        return f"{int_value:,}"
+    return str(int_value)
+
+
+def format_limit_value(value, item):
+    if value in (None, ""):
+        return ""
+    if item in {"IGSS", "VGSS"}:
+        return f"+/-{value}"
+    return value
+
+
+def format_esd_display(raw_value):
+    if raw_value in (None, ""):
+        return ""
+    text = str(raw_value).strip()
+    if not text:
+        return ""
+
+    parts = re.split(r"\s*[:：]\s*", text, maxsplit=1)
+    level_text = parts[0].strip()
+    descriptor = parts[1].strip().lower() if len(parts) > 1 else ""
+
+    level_number = None
+    try:
+        if level_text:
+            level_number = int(
+                Decimal(level_text).to_integral_value(rounding=ROUND_HALF_UP)
+            )
+    except (InvalidOperation, ValueError, TypeError):
+        level_number = None
+
+    descriptor_contains_protected = "protect" in descriptor
+    descriptor_contains_non = "non" in descriptor
+
+    if descriptor_contains_protected and descriptor_contains_non:
+        return ""
+
+    if descriptor_contains_protected:
+        if not level_number or level_number <= 1:
+            return "*ESD protected"
+        return f"*ESD Protected : {level_number}V"
+
+    return text
+
+
+def render_spec_sheet(
+    device_data: Dict[str, Any],
+    elec_data: List[Dict[str, Any]],
+    related_devices: List[Dict[str, Any]],
+) -> bytes:
+    """Fills a copy of the cached template and returns the .xlsx file content."""
+    wb = template_cache.get(template_path())
+    ws = wb.active
+    if ws is None or not isinstance(ws, Worksheet):
+        raise ValueError("Invalid template: no active worksheet")
+
+    # Fill Data based on new template structure
+
+    # Header Info
+    ws["J5"] = get_val(device_data, "sheet_no")
+    ws["N5"] = get_val(device_data, "sheet_revision")
+
+    # Type
+    ws["D7"] = get_val(device_data, "sheet_name")
+
+    # Chip Specs
+    chip_x = format_decimal_value(get_val(device_data, "chip_x_mm"), digits=2)
+    chip_y = format_decimal_value(get_val(device_data, "chip_y_mm"), digits=2)
+    ws["L8"] = f"{chip_x} * {chip_y} mm" if chip_x or chip_y else ""
+    ws["L10"] = (
+        f"{get_val(device_data, 'pad_x_gate_um')} * {get_val(device_data, 'pad_y_gate_um')} um"
+    )
+    ws["L11"] = (
+        f"{get_val(device_data, 'pad_x_source_um')} * {get_val(device_data, 'pad_y_source_um')} um"
+    )
+    ws["L12"] = f"{get_val(device_data, 'dicing_line_um')} um"
+    pdpw_value = format_integer_value(get_val(device_data, "pdpw"), use_grouping=True)
+    ws["L16"] = f"{pdpw_value} pcs" if pdpw_value else ""
+
+    # Chip Appearance Image (C9)
+    # Use placeholder when the appearance file is missing
+    source_path = chip_appearance_path(
+        get_val(device_data, "appearance")
+    ) or chip_appearance_path(NO_IMAGE_FILE)
+
+    if source_path is not None:
+        try:
+            # Embed the pre-scaled copy, not the full-resolution original
+            img = Image(str(chip_image_cache.export_image(source_path)))
+            # Resize image to fit 5cm (approx 189 pixels at 96 DPI)
+            # 1 cm = 37.795 px
+            target_size_px = settings.CHIP_IMAGE_EXPORT_PX
+
+            # Resize keeping aspect ratio
+            if img.width > 0 and img.height > 0:
+                ratio = min(target_size_px / img.width, target_size_px / img.height)
+                img.width = int(img.width * ratio)
+                img.height = int(img.height * ratio)
+
+            # Anchor to C9 with offset
+            # C9 is col=2, row=8 (0-indexed)
+            # Offset by 10 pixels vertically to avoid overlap with top border
+            row_offset_emu = pixels_to_EMU(10)
+            marker = AnchorMarker(col=2, colOff=0, row=8, rowOff=row_offset_emu)
+
+            # Define size in EMUs
+            size = XDRPositiveSize2D(
+                pixels_to_EMU(img.width), pixels_to_EMU(img.height)
+            )
+
+            img.anchor = OneCellAnchor(_from=marker, ext=size)
+            ws.add_image(img)
+        except Exception as e:
+            print(f"Failed to add image: {e}")
+
+    # Maximum Ratings
+    ws["G19"] = get_val(device_data, "vdss_V")
+    ws["G20"] = get_val(device_data, "vgss_V")
+
+    # Wafer Probing Spec (Starts at Row 25)
+    # Columns: No(C), Item(D), Min(F), Typ(G), Max(H), Unit(I), Cond(J)
+    start_row = 25
+    base_available_rows = 10
+    num_items = len(elec_data)
+    extra_probe_rows = max(0, num_items - base_available_rows)
+    if extra_probe_rows:
+        ws.insert_rows(start_row + base_available_rows, extra_probe_rows)
+
+    center_align = Alignment(horizontal="center", vertical="center")
+    left_align = Alignment(horizontal="left", vertical="center")
+
+    total_probe_rows = max(base_available_rows, num_items)
+    for i in range(total_probe_rows):
+        row = start_row + i
+        if i < num_items:
+            char = elec_data[i]
+            item_name = char.get("item")
+            ws.cell(row=row, column=3, value=i + 1).alignment = center_align
+            ws.cell(row=row, column=4, value=item_name).alignment = left_align
+            ws.cell(
+                row=row,
+                column=6,
+                value=format_limit_value(char.get("min"), item_name),
+            ).alignment = center_align
+            ws.cell(
+                row=row,
+                column=7,
+                value=format_limit_value(char.get("typ"), item_name),
+            ).alignment = center_align
+            ws.cell(
+                row=row,
+                column=8,
+                value=format_limit_value(char.get("max"), item_name),
+            ).alignment = center_align
+            ws.cell(row=row, column=9, value=char.get("unit")).alignment = center_align
+            ws.cell(
+                row=row, column=10, value=format_condition(char)
+            ).alignment = left_align
+        else:
+            for col in [3, 4, 6, 7, 8, 9, 10]:
+                ws.cell(row=row, column=col, value="")
+
+    # Tracking of row shifts for subsequent sections
+    esd_base_row = 36
+    related_base_row = 49
+    sheet_name_base_row = 48
+    update_date_base_row = 61
+
+    # ESD row should shift only by probe insertions
+    esd_row = esd_base_row + extra_probe_rows
+    ws.cell(
+        row=esd_row,
+        column=4,
+        value=format_esd_display(get_val(device_data, "esd_display")),
+    )
+
+    # Related Devices (Starts at Row 49)
+    # Columns: Type(F), Top Metal(I), Wafer Thickness(K), Back Metal(M)
+    related_start_row = related_base_row + extra_probe_rows
+    base_related_rows = 12
+    num_related = len(related_devices)
+    for i in range(base_related_rows):
+        row = related_start_row + i
+        if i < num_related:
+            dev = related_devices[i]
+            ws.cell(row=row, column=6, value=dev.get("type"))
+            ws.cell(row=row, column=9, value=dev.get("top_metal_display"))
+            ws.cell(row=row, column=11, value=dev.get("wafer_thickness_display"))
+            ws.cell(row=row, column=13, value=dev.get("back_metal_display"))
+        else:
+            for col in [6, 9, 11, 13]:
+                ws.cell(row=row, column=col, value="")
+
+    # G48 (Base G48) - Sheet Name
+    g48_row = sheet_name_base_row + extra_probe_rows
+    ws.cell(row=g48_row, column=7, value=get_val(device_data, "sheet_name"))
+
+    # Update Date (Base M61) shifts only with probe insertions
+    update_date_row = update_date_base_row + extra_probe_rows
+    ws.cell(
+        row=update_date_row,
+        column=13,
+        value=f"'{date.today().strftime('%Y/%m/%d')}",
+    ).alignment = left_align
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def spec_sheet_filename(device_data: Dict[str, Any]) -> str:
+    """[sheet_no]_[sheet_name].xlsx"""
+    s_no = get_val(device_data, "sheet_no", "X")
+    s_name = get_val(device_data, "sheet_name", "X")
+    if not s_no:
+        s_no = "X"
+    if not s_name:
+        s_name = "X"
+    return f"{s_no}_{s_name}.xlsx"
+
+
+def _zip_safe_name(name: str) -> str:
+    return name.replace("/", "_").replace("\\", "_")
+
+
+def bulk_spec_sheet_entries(
+    spec_data: Dict[str, Dict[str, Any]],
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Assigns a ZIP entry name to each spec sheet to render.
+    Devices sharing a sheet_no produce the same sheet (it lists all related
+    devices), so each sheet is rendered once; other name clashes get the device type appended.
+    """
+    entries = []
+    seen_sheets = set()
+    used_names = set()
+    for device_type, data in spec_data.items():
+        sheet_no = data["device"].get("sheet_no")
+        if sheet_no:
+            if sheet_no in seen_sheets:
+                continue
+            seen_sheets.add(sheet_no)
+        name = _zip_safe_name(spec_sheet_filename(data["device"]))
+        if name in used_names:
+            name = _zip_safe_name(f"{name[: -len('.xlsx')]}_{device_type}.xlsx")
+        used_names.add(name)
+        entries.append((name, data))
+    return entries
+
+
+def _render_entry(data: Dict[str, Any]) -> bytes:
+    return render_spec_sheet(
+        data["device"], data["characteristics"], data["related_devices"]
+    )
+
+
+def _render_entries(
+    entries: List[Tuple[str, Dict[str, Any]]], workers: int
+) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Yields (name, content, error) in entry order. With several workers the
+    sheets are rendered in worker processes, at most two per worker ahead of
+    the consumer so memory stays bounded.
+    """
+    if workers <= 1:
+        for name, data in entries:
+            try:
+                yield name, _render_entry(data), None
+            except Exception as e:
+                yield name, None, str(e)
+        return
+
+    # spawn: forking the multi-threaded server process is unsafe
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    pending: deque[Tuple[str, Future]] = deque()
+    try:
+        for name, data in entries:
+            pending.append((name, pool.submit(_render_entry, data)))
+            if len(pending) >= workers * 2:
+                yield _entry_result(*pending.popleft())
+        while pending:
+            yield _entry_result(*pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _entry_result(
+    name: str, future: Future
+) -> Tuple[str, Optional[bytes], Optional[str]]:
+    try:
+        return name, future.result(), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class _ZipSink(RawIOBase):
+    """Write-only file object for ZipFile; take() returns the bytes written since the last call."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        return len(chunk)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_spec_sheet_zip(
+    entries: List[Tuple[str, Dict[str, Any]]],
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Iterator[bytes]:
+    """
+    Renders the spec sheets and yields a ZIP archive as each one completes,
+    so the download starts before the last sheet is rendered.
+    Sheets that fail to render are listed in errors.txt instead of aborting the archive.
+    progress is called with the number of sheets done so far.
+    """
+    if workers is None:
+        workers = settings.SPEC_SHEET_EXPORT_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(entries))
+
+    sink = _ZipSink()
+    errors = []
+    # Not seekable: ZipFile writes data descriptors and the central directory at the end
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for done, (name, content, error) in enumerate(
+            _render_entries(entries, workers), start=1
+        ):
+            if progress is not None:
+                progress(done)
+            if content is None:
+                errors.append(f"{name}: {error}")
+                continue
+            archive.writestr(name, content)
+            yield sink.take()
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+    yield sink.take()
@@ -1,11 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from .core.config import settings
-from .api.v1.routers import tables, devices, audit_logs
+from .core.database import init_engine, dispose_engine
+from .core.compression import CompressionMiddleware
+from .core.http_cache import ConditionalGetMiddleware
+from .core.jobs import job_manager
+from .core.lanes import shutdown_lanes
+from .api.v1.routers import tables, devices, audit_logs, admin, jobs
 
-app = FastAPI(title="Master Table Manager API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Builds the shared database engine on startup; on shutdown stops the worker pools and releases it."""
+    init_engine()
+    yield
+    shutdown_lanes()
+    job_manager.shutdown()
+    dispose_engine()
+
+
+app = FastAPI(title="Master Table Manager API", lifespan=lifespan)
 
 
 @app.get("/")
@@ -35,16 +52,24 @@ origins = [
     "http://127.0.0.1:5174",
 ]
 
+# ETag / Cache-Control for read endpoints (inside CORS so 304s get CORS headers)
+app.add_middleware(ConditionalGetMiddleware)
+
+# gzip/brotli compression of large responses and streamed exports
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "ETag"],
 )
 
 # Include Routers
 app.include_router(tables.router, prefix="/api", tags=["tables"])
 app.include_router(devices.router, prefix="/api", tags=["devices"])
 app.include_router(audit_logs.router, prefix="/api", tags=["audit_logs"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
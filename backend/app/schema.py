@@ -8,6 +8,7 @@ from sqlalchemy import (
     Date,
     Boolean,
     BigInteger,
+    Index,
 )
 
 metadata = MetaData()
@@ -18,6 +19,14 @@ metadata = MetaData()
 # On the other hand, a column with type BIGINT PRIMARY KEY will be an auto-incrementing integer
 # only if it is NOT an alias for the ROWID, but in SQLAlchemy, to get auto-increment behavior easily in SQLite,
 # it is best to use Integer which maps to INTEGER.
+#
+# Secondary indexes (Index(...) below) cover the join keys, filter and sort
+# columns of the list, detail and export queries. The import script creates
+# them; GET /api/admin/query-plans shows whether the queries use them.
+#
+# info={"summary_columns": (...)} lists the columns of the grid's summary mode
+# (GET /api/tables/{name}?fields=summary) for the wider tables; primary keys
+# and 更新日 are always included, other tables return every column.
 
 # Table: MT_back_metal
 mt_back_metal = Table(
@@ -30,6 +39,7 @@ mt_back_metal = Table(
     Column("back_metal_anneal", String),
     Column("back_metal_display", String),
     Column("更新日", Date),
+    Index("ix_MT_back_metal_back_metal", "back_metal"),
 )
 
 # Table: MT_barrier
@@ -66,6 +76,10 @@ mt_device = Table(
     Column("back_metal", String),
     Column("status", String),
     Column("更新日", Date),
+    Index("ix_MT_device_sheet_no", "sheet_no"),
+    Index("ix_MT_device_top_metal", "top_metal"),
+    Index("ix_MT_device_back_metal", "back_metal"),
+    info={"summary_columns": ("type", "sheet_no", "status")},
 )
 
 # Table: MT_elec_characteristic
@@ -88,6 +102,8 @@ mt_elec_characteristic = Table(
     Column("bias_iss", String),
     Column("cond", String),
     Column("更新日", Date),
+    Index("ix_MT_elec_characteristic_sheet_no", "sheet_no"),
+    info={"summary_columns": ("sheet_no", "item", "min", "typ", "max", "unit")},
 )
 
 # Table: MT_esd
@@ -129,6 +145,8 @@ mt_maskset = Table(
     Column("pad_x_source_um", Integer),
     Column("pad_y_source_um", Integer),
     Column("更新日", Date),
+    Index("ix_MT_maskset_maskset", "maskset"),
+    info={"summary_columns": ("maskset", "level", "chip_x_mm", "chip_y_mm")},
 )
 
 # Table: MT_passivation
@@ -157,6 +175,8 @@ mt_spec_sheet = Table(
     Column("esd_display", String),
     Column("maskset", String),
     Column("更新日", Date),
+    Index("ix_MT_spec_sheet_maskset", "maskset"),
+    info={"summary_columns": ("sheet_no", "sheet_name", "sheet_revision", "maskset")},
 )
 
 # Table: MT_status
@@ -177,6 +197,7 @@ mt_top_metal = Table(
     Column("top_metal_thickness_um", Float),
     Column("top_metal_display", String),
     Column("更新日", Date),
+    Index("ix_MT_top_metal_top_metal", "top_metal"),
 )
 
 # Table: MT_unit
@@ -211,4 +232,61 @@ audit_log = Table(
     Column("action", String),
     Column("target", String),
     Column("details", String),
+    Index("ix_AuditLog_timestamp", "timestamp"),
+    info={"summary_columns": ("timestamp", "user", "action", "target")},
 )
+
+# Table: TableStats
+# Internal bookkeeping (hidden from the table list): unfiltered row count per table,
+# written by the import script and kept up to date by the API write paths.
+table_stats = Table(
+    "TableStats",
+    metadata,
+    Column("table_name", String, primary_key=True),
+    Column("row_count", Integer),
+    Column("updated_at", String),  # ISO format datetime string
+    info={"internal": True},
+)
+
+# Table: device_view
+# Internal materialised join of MT_device with its spec sheet, maskset, metal and
+# wafer rows (one row per device). Rebuilt by the import script and patched by the
+# API write paths; the device listing, search, sort and export read only this table.
+device_view = Table(
+    "device_view",
+    metadata,
+    Column("type", String, primary_key=True),
+    Column("sheet_no", String),
+    Column("status", String),
+    Column("barrier", String),
+    Column("top_metal", String),
+    Column("passivation", String),
+    Column("wafer_thickness", String),
+    Column("back_metal", String),
+    Column("sheet_name", String),
+    Column("sheet_revision", Integer),
+    Column("vdss_V", Integer),
+    Column("vgss_V", Integer),
+    Column("idss_A", Integer),
+    Column("esd_display", String),
+    Column("maskset", String),
+    Column("chip_x_mm", Float),
+    Column("chip_y_mm", Float),
+    Column("appearance", String),
+    Column("top_metal_display", String),
+    Column("back_metal_display", String),
+    Column("wafer_thickness_display", String),
+    Index("ix_device_view_sheet_no", "sheet_no"),
+    Index("ix_device_view_sheet_name", "sheet_name"),
+    Index("ix_device_view_status", "status"),
+    Index("ix_device_view_vdss_V", "vdss_V"),
+    Index("ix_device_view_vgss_V", "vgss_V"),
+    Index("ix_device_view_idss_A", "idss_A"),
+    info={"internal": True},
+)
+# Text filters are case-insensitive prefix ranges (core/filters.py), which only
+# a NOCASE index can serve
+Index("ix_device_view_type_nocase", device_view.c.type.collate("NOCASE"))
+Index("ix_device_view_sheet_no_nocase", device_view.c.sheet_no.collate("NOCASE"))
+Index("ix_device_view_sheet_name_nocase", device_view.c.sheet_name.collate("NOCASE"))
+Index("ix_device_view_status_nocase", device_view.c.status.collate("NOCASE"))
@@ -1,17 +1,53 @@
+import argparse
+import importlib.util
+import io
+import json
 import pandas as pd
 import sqlalchemy
-from sqlalchemy import create_engine
 import os
+import re
 import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from pydantic import ValidationError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.schema import CreateTable
 
 # Add backend directory to path to import modules
 backend_dir = os.path.dirname(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 )
 sys.path.insert(0, backend_dir)
-from app.core.config import settings  # type: ignore  # noqa: E402
+from app.core.config import ExcelEngine, settings  # type: ignore  # noqa: E402
+from app.core.database import create_db_engine, sqlite_url  # type: ignore  # noqa: E402
+from app.core.schema_registry import (  # type: ignore  # noqa: E402
+    current_search_indexes,
+    generation_db_file,
+    is_search_index_table,
+    published_db_file,
+    read_schema_stamp,
+    search_index_name,
+    write_schema_stamp,
+)
+from app.core.search import (  # type: ignore  # noqa: E402
+    create_search_indexes,
+    is_searchable,
+)
+from app.core.counts import refresh_row_counts  # type: ignore  # noqa: E402
+from app.core.device_view import (  # type: ignore  # noqa: E402
+    DEVICE_VIEW_SOURCES,
+    rebuild_device_view,
+)
+from app.core.images import chip_image_cache  # type: ignore  # noqa: E402
+from app.core.import_progress import format_progress  # type: ignore  # noqa: E402
+from app.core.fingerprint import (  # type: ignore  # noqa: E402
+    load_import_fingerprint,
+    save_import_fingerprint,
+    stat_matches,
+    workbook_fingerprint,
+)
 from app.schema import metadata  # type: ignore  # noqa: E402
 from app.models import (  # type: ignore  # noqa: E402
     MT_BackMetal,
@@ -30,247 +66,899 @@ from app.models import (  # type: ignore  # noqa: E402
 )
 
 
-def import_data():
-    """Imports data from Excel to SQLite using strict schema and Pydantic validation."""
-    master_file = settings.resolved_master_excel_file
-    if not os.path.exists(str(master_file)):
-        print(f"Error: Input file '{master_file}' not found.")
-        sys.exit(1)
+# Model Mapping
+MODEL_MAPPING = {
+    "MT_back_metal": MT_BackMetal,
+    "MT_barrier": MT_Barrier,
+    "MT_device": MT_Device,
+    "MT_elec_characteristic": MT_ElecCharacteristic,
+    "MT_esd": MT_Esd,
+    "MT_item": MT_Item,
+    "MT_maskset": MT_Maskset,
+    "MT_passivation": MT_Passivation,
+    "MT_spec_sheet": MT_SpecSheet,
+    "MT_status": MT_Status,
+    "MT_top_metal": MT_TopMetal,
+    "MT_unit": MT_Unit,
+    "MT_wafer_thickness": MT_WaferThickness,
+}
+
+# FK Constraints: (Table, Column) -> (RefTable, RefColumn)
+FK_CONSTRAINTS = {
+    ("MT_device", "sheet_no"): ("MT_spec_sheet", "sheet_no"),
+    ("MT_device", "barrier"): ("MT_barrier", "barrier"),
+    ("MT_device", "top_metal"): ("MT_top_metal", "top_metal"),
+    ("MT_device", "passivation"): ("MT_passivation", "passivation_type"),
+    ("MT_device", "back_metal"): ("MT_back_metal", "back_metal"),
+    ("MT_device", "status"): ("MT_status", "status"),
+    ("MT_spec_sheet", "maskset"): ("MT_maskset", "maskset"),
+}
+
+RETIRED_DATABASE_MESSAGE = (
+    "This database has been replaced by a newer import. Please retry the request."
+)
 
-    print(f"Reading data from {master_file}...")
+# Set by --progress-json (import jobs read these lines instead of the log text)
+_progress_json = False
+
+
+def report_progress(
+    percent: float,
+    message: str,
+    done: Optional[int] = None,
+    total: Optional[int] = None,
+) -> None:
+    """Writes a progress line for the import job (only with --progress-json)."""
+    if _progress_json:
+        print(format_progress(percent, message, done, total))
+
+
+# A superset of the spellings pydantic accepts, so anything left unconverted
+# is reported by validate_records
+_TRUE_VALUES = {True, 1, "1", "true", "t", "yes", "y", "on", "+"}
+_FALSE_VALUES = {False, 0, "0", "false", "f", "no", "n", "off", "-"}
+_BOOLEAN_ERROR_TYPES = {"bool_parsing", "bool_type"}
+
+
+def _coerce_boolean(values: pd.Series) -> pd.Series:
+    """
+    Maps common spellings of true/false to bool. Anything else is left as is
+    so validation can report it.
+    """
+
+    def to_bool(value):
+        key = value.strip().lower() if isinstance(value, str) else value
+        if key in _TRUE_VALUES:
+            return True
+        if key in _FALSE_VALUES:
+            return False
+        return value
+
+    return values.astype(object).map(to_bool, na_action="ignore")
+
+
+def prepare_frame(df: pd.DataFrame, table: sqlalchemy.Table) -> pd.DataFrame:
+    """Drops/adds columns and coerces every column to its schema type (column-wise)."""
+    # 1. Handle 'id' column
+    id_col = next((c for c in df.columns if c.lower() == "id"), None)
+    if id_col:
+        df = df.drop(columns=[id_col])
+
+    # 2. Add missing columns (e.g. +/- in MT_elec_characteristic)
+    if "+/-" in table.columns and "+/-" not in df.columns:
+        df["+/-"] = None
+
+    # 3. Type conversion and cleaning
+    for col in table.columns:
+        if col.name not in df.columns:
+            continue
+        values = df[col.name]
+        if col.name == "更新日" or isinstance(col.type, sqlalchemy.Date):
+            df[col.name] = pd.to_datetime(values, errors="coerce").dt.date
+        elif isinstance(
+            col.type, (sqlalchemy.Integer, sqlalchemy.Float, sqlalchemy.BigInteger)
+        ):
+            # Use pd.to_numeric to coerce non-numeric values to NaN
+            df[col.name] = pd.to_numeric(values, errors="coerce")
+        elif isinstance(col.type, sqlalchemy.Boolean):
+            df[col.name] = _coerce_boolean(values)
+        elif isinstance(col.type, sqlalchemy.String):
+            # Coerce to string, preserving None
+            df[col.name] = values.astype(str).where(values.notna(), None)
+    return df
+
+
+def frame_to_records(df: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+    """Converts the frame to plain Python dicts (numpy scalars to Python, NaN/NaT to None)."""
+    df = df[columns].astype(object)
+    df = df.where(df.notna(), None)
+    return [dict(zip(columns, row)) for row in df.itertuples(index=False, name=None)]
+
+
+def validate_records(
+    sheet_name: str,
+    records: List[Dict[str, Any]],
+    row_numbers: List[int],
+    model,
+) -> List[Dict[str, Any]]:
+    """
+    Validates the rows in batches with one TypeAdapter call per batch.
+    Unrecognised boolean values are reported and cleared (imported as NULL).
+    """
+    adapter = TypeAdapter(list[model])
+    batch_rows = settings.IMPORT_BATCH_ROWS
+    errors = []
+    for start in range(0, len(records), batch_rows):
+        try:
+            adapter.validate_python(records[start : start + batch_rows])
+        except ValidationError as e:
+            for err in e.errors():
+                position = start + int(err["loc"][0])
+                column = str(err["loc"][1]) if len(err["loc"]) > 1 else None
+                value = records[position].get(column) if column else None
+                message = err["msg"]
+                if column and err["type"] in _BOOLEAN_ERROR_TYPES:
+                    records[position][column] = None
+                    message += " (imported as empty)"
+                errors.append(
+                    {
+                        "sheet": sheet_name,
+                        "row": row_numbers[position],
+                        "column": column,
+                        "error": message,
+                        "value": value,
+                    }
+                )
+    return errors
+
+
+def find_duplicate_keys(
+    sheet_name: str,
+    df: pd.DataFrame,
+    row_numbers: List[int],
+    table: sqlalchemy.Table,
+) -> Tuple[pd.Series, List[Dict[str, Any]]]:
+    """
+    Flags rows repeating an earlier primary key. Returns a keep-mask and the errors;
+    without this the executemany would fail on the first duplicate.
+    """
+    pk_columns = [c.name for c in table.primary_key.columns if c.name in df.columns]
+    if not pk_columns:
+        return pd.Series(True, index=df.index), []
+    duplicated = df.duplicated(subset=pk_columns, keep="first")
+    errors = []
+    for position in duplicated.to_numpy().nonzero()[0]:
+        val = df[pk_columns[0]].iloc[position]
+        errors.append(
+            {
+                "sheet": sheet_name,
+                "row": row_numbers[position],
+                "column": pk_columns[0],
+                "error": f"Duplicate primary key: Value '{val}' appears earlier in the sheet (row skipped)",
+                "value": val,
+            }
+        )
+    return ~duplicated, errors
+
+
+def build_reference_sets(
+    dfs: Dict[str, pd.DataFrame],
+) -> Dict[Tuple[str, str], Set[str]]:
+    """Collects the referenced key values once per (table, column)."""
+    reference_sets = {}
+    for ref_t, ref_c in set(FK_CONSTRAINTS.values()):
+        # We use the original DF for reference to ensure we check against all potential data
+        if ref_t in dfs and ref_c in dfs[ref_t].columns:
+            reference_sets[(ref_t, ref_c)] = set(dfs[ref_t][ref_c].dropna().astype(str))
+    return reference_sets
+
+
+def check_foreign_keys(
+    sheet_name: str,
+    df: pd.DataFrame,
+    row_numbers: List[int],
+    reference_sets: Dict[Tuple[str, str], Set[str]],
+) -> List[Dict[str, Any]]:
+    """Flags values missing from the referenced column with a vectorised isin()."""
+    errors = []
+    for (t, c), (ref_t, ref_c) in FK_CONSTRAINTS.items():
+        if t != sheet_name or c not in df.columns:
+            continue
+        ref_values = reference_sets.get((ref_t, ref_c))
+        if ref_values is None:
+            continue
+        values = df[c]
+        violations = values.notna() & ~values.astype(str).isin(ref_values)
+        for position in violations.to_numpy().nonzero()[0]:
+            val = values.iloc[position]
+            errors.append(
+                {
+                    "sheet": sheet_name,
+                    "row": row_numbers[position],
+                    "column": c,
+                    "error": f"Foreign Key violation: Value '{val}' not found in {ref_t}.{ref_c}",
+                    "value": val,
+                }
+            )
+    return errors
+
+
+def prepare_sheets(
+    sheet_names: List[str], dfs: Dict[str, pd.DataFrame]
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Coerces and validates every known sheet. Returns the rows per table and the errors."""
+    prepared = {}
+    validation_errors = []
+    reference_sets = build_reference_sets(dfs)
+
+    for position, sheet_name in enumerate(sheet_names, start=1):
+        report_progress(
+            10.0 + 30.0 * position / len(sheet_names),
+            f"Processing sheet: {sheet_name}",
+            position,
+            len(sheet_names),
+        )
+        if sheet_name not in metadata.tables:
+            print(f"Skipping sheet '{sheet_name}' as it is not defined in schema.")
+            continue
+
+        print(f"Processing sheet: {sheet_name}")
+        table = metadata.tables[sheet_name]
+        model = MODEL_MAPPING.get(sheet_name)
+
+        if not model:
+            print(
+                f"Warning: No Pydantic model found for {sheet_name}. Skipping validation."
+            )
 
+        df = prepare_frame(dfs[sheet_name], table)
+        valid_columns = [c.name for c in table.columns if c.name in df.columns]
+        records = frame_to_records(df, valid_columns)
+        # Excel row number (1-header + 1-index)
+        row_numbers = [index + 2 for index in df.index]
+
+        # RELAXATION: Rows are only skipped for duplicate primary keys;
+        # other errors are just reported.
+        sheet_errors = []
+        if model:
+            sheet_errors += validate_records(sheet_name, records, row_numbers, model)
+        sheet_errors += check_foreign_keys(sheet_name, df, row_numbers, reference_sets)
+        keep, duplicate_errors = find_duplicate_keys(sheet_name, df, row_numbers, table)
+        sheet_errors += duplicate_errors
+        sheet_errors.sort(key=lambda err: err["row"])
+        validation_errors.extend(sheet_errors)
+        if duplicate_errors:
+            records = [r for r, k in zip(records, keep.to_numpy()) if k]
+
+        prepared[sheet_name] = records
+
+    return prepared, validation_errors
+
+
+def report_validation_errors(validation_errors: List[Dict[str, Any]]) -> None:
+    if not validation_errors:
+        return
+    print("\n" + "=" * 50)
+    print("VALIDATION ERRORS FOUND")
+    print("=" * 50)
+    for err in validation_errors:
+        print(
+            f"Sheet: {err['sheet']}, Row: {err['row']}, Col: {err['column']}, Error: {err['error']}, Value: {err['value']}"
+        )
+    print("=" * 50 + "\n")
+
+    print(f"Total Validation Errors: {len(validation_errors)}")
+    print(
+        f"Rows with warnings (imported): {len(set((e['sheet'], e['row']) for e in validation_errors))}"
+    )
+
+
+def _execute_batches(conn, stmt, params: List[Dict[str, Any]]) -> None:
+    """Runs stmt as executemany, IMPORT_BATCH_ROWS parameter sets at a time."""
+    batch_rows = settings.IMPORT_BATCH_ROWS
+    for start in range(0, len(params), batch_rows):
+        conn.execute(stmt, params[start : start + batch_rows])
+
+
+def _log_import(conn, target: str, details: str) -> None:
+    conn.execute(
+        metadata.tables["AuditLog"]
+        .insert()
+        .values(
+            timestamp=datetime.now().isoformat(),
+            user="System",
+            action="IMPORT",
+            target=target,
+            details=details,
+        )
+    )
+
+
+def _remove_db_file(db_file: Path) -> bool:
+    """Deletes a database file and its journal files. Returns False if still in use."""
     try:
-        # Read all sheets
-        xls = pd.ExcelFile(str(master_file))
-        sheet_names = xls.sheet_names
-        print(f"Found sheets: {sheet_names}")
-
-        # Load all sheets into memory for FK validation
-        dfs = {}
-        for sheet in sheet_names:
-            dfs[sheet] = pd.read_excel(xls, sheet_name=sheet)
-
-        engine = create_engine(settings.DB_URL)
-
-        # Drop all tables and recreate them based on schema, but preserve AuditLog
-        print("Recreating database schema (preserving AuditLog)...")
-
-        # Reflect existing tables
-        inspector = sqlalchemy.inspect(engine)
-        existing_tables = inspector.get_table_names()
-
-        # Drop tables except AuditLog
-        for table_name in existing_tables:
-            if table_name != "AuditLog":
-                with engine.connect() as conn:
-                    conn.execute(sqlalchemy.text(f"DROP TABLE IF EXISTS {table_name}"))
-                    conn.commit()
-
-        # Create all tables
-        metadata.create_all(engine)
-
-        # Model Mapping
-        model_mapping = {
-            "MT_back_metal": MT_BackMetal,
-            "MT_barrier": MT_Barrier,
-            "MT_device": MT_Device,
-            "MT_elec_characteristic": MT_ElecCharacteristic,
-            "MT_esd": MT_Esd,
-            "MT_item": MT_Item,
-            "MT_maskset": MT_Maskset,
-            "MT_passivation": MT_Passivation,
-            "MT_spec_sheet": MT_SpecSheet,
-            "MT_status": MT_Status,
-            "MT_top_metal": MT_TopMetal,
-            "MT_unit": MT_Unit,
-            "MT_wafer_thickness": MT_WaferThickness,
-        }
-
-        # FK Constraints: (Table, Column) -> (RefTable, RefColumn)
-        fk_constraints = {
-            ("MT_device", "sheet_no"): ("MT_spec_sheet", "sheet_no"),
-            ("MT_device", "barrier"): ("MT_barrier", "barrier"),
-            ("MT_device", "top_metal"): ("MT_top_metal", "top_metal"),
-            ("MT_device", "passivation"): ("MT_passivation", "passivation_type"),
-            ("MT_device", "back_metal"): ("MT_back_metal", "back_metal"),
-            ("MT_device", "status"): ("MT_status", "status"),
-            ("MT_spec_sheet", "maskset"): ("MT_maskset", "maskset"),
-        }
-
-        total_imported_rows = 0
-        imported_tables = []
-        validation_errors = []
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            db_file.with_name(db_file.name + suffix).unlink(missing_ok=True)
+    except OSError:
+        return False
+    return True
+
+
+def build_database(
+    engine: sqlalchemy.Engine, prepared: Dict[str, List[Dict[str, Any]]]
+) -> Dict[str, int]:
+    """Creates every table in the (empty) shadow database and loads all rows."""
+    imported = {}
+
+    with engine.connect() as conn:
+        # Secondary indexes are built after loading, not maintained row by row
+        for table in metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+
+        for sheet_name, records in prepared.items():
+            # Insert all rows with executemany (single transaction, one savepoint per sheet)
+            if records:
+                try:
+                    with conn.begin_nested():
+                        _execute_batches(
+                            conn, metadata.tables[sheet_name].insert(), records
+                        )
+                    imported[sheet_name] = len(records)
+                    print(f"  Imported {len(records)} rows into '{sheet_name}'.")
+                except Exception as e:
+                    print(f"  Error importing '{sheet_name}': {e}")
+            else:
+                print(f"  No valid rows to import for '{sheet_name}'.")
+
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn)
+        print("Built secondary indexes.")
+        report_progress(70.0, "Built indexes")
+
+        # Materialised device listing (before its search index is built)
+        view_rows = rebuild_device_view(conn)
+        print(f"Built device_view with {view_rows} rows.")
+        report_progress(75.0, "Built device listing")
+
+        # Build full-text search indexes for the global search box
+        indexed_tables = create_search_indexes(conn, metadata.sorted_tables)
+        print(f"Built search indexes for {len(indexed_tables)} tables.")
+        report_progress(85.0, "Built search indexes")
+
+        # Row counts used by unfiltered listings
+        refresh_row_counts(conn, metadata.tables)
+        conn.commit()
+
+    return imported
+
+
+def validate_database(engine: sqlalchemy.Engine, imported: Dict[str, int]) -> List[str]:
+    """Checks the shadow database before it is published. Returns the problems found."""
+    problems = []
+    with engine.connect() as conn:
+        check = conn.exec_driver_sql("PRAGMA quick_check").scalar()
+        if check != "ok":
+            problems.append(f"quick_check failed: {check}")
+        inspector = sqlalchemy.inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                problems.append(f"table '{table.name}' is missing")
+            else:
+                if is_searchable(table.name) and (
+                    search_index_name(table.name) not in existing_tables
+                ):
+                    problems.append(f"the search index of '{table.name}' is missing")
+                existing_indexes = {
+                    ix["name"] for ix in inspector.get_indexes(table.name)
+                }
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        problems.append(f"index '{index.name}' is missing")
+        for table_name, expected in imported.items():
+            count = conn.execute(
+                sqlalchemy.select(sqlalchemy.func.count()).select_from(
+                    metadata.tables[table_name]
+                )
+            ).scalar()
+            if count != expected:
+                problems.append(f"'{table_name}' has {count} rows, expected {expected}")
+    return problems
+
+
+def copy_audit_log(source, target) -> int:
+    """Copies every AuditLog entry (ids included) into the new database."""
+    audit_log_table = metadata.tables["AuditLog"]
+    source_table = sqlalchemy.Table(
+        "AuditLog", sqlalchemy.MetaData(), autoload_with=source
+    )
+    columns = [c.name for c in audit_log_table.columns if c.name in source_table.c]
+    rows = [
+        dict(row)
+        for row in source.execute(
+            sqlalchemy.select(*[source_table.c[c] for c in columns])
+        ).mappings()
+    ]
+    if rows:
+        _execute_batches(target, audit_log_table.insert(), rows)
+    return len(rows)
+
+
+def retire_database(conn) -> None:
+    """
+    Makes every later write to the replaced database fail. A request that was
+    waiting for the write lock during the swap gets an error instead of writing
+    to a file nobody reads any more.
+    """
+    table_names = conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    ).scalars()
+    for table_name in list(table_names):
+        if is_search_index_table(table_name):
+            continue
+        quoted = '"' + table_name.replace('"', '""') + '"'
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            trigger = (
+                '"'
+                + f"{table_name}_retired_{operation.lower()}".replace('"', '""')
+                + '"'
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {trigger} BEFORE {operation} ON {quoted} "
+                f"BEGIN SELECT RAISE(ABORT, '{RETIRED_DATABASE_MESSAGE}'); END"
+            )
 
-        with engine.connect() as conn:
-            for sheet_name in sheet_names:
-                if sheet_name not in metadata.tables:
-                    print(
-                        f"Skipping sheet '{sheet_name}' as it is not defined in schema."
-                    )
-                    continue
 
-                print(f"Processing sheet: {sheet_name}")
-                df = dfs[sheet_name]
-                table = metadata.tables[sheet_name]
-                model = model_mapping.get(sheet_name)
+def remove_old_generations(keep: List[Path]) -> None:
+    """Deletes database files of earlier imports (the previous one may still be read)."""
+    db_file = settings.DB_FILE
+    pattern = re.compile(
+        rf"^{re.escape(db_file.stem)}\.\d+{re.escape(db_file.suffix)}$"
+    )
+    candidates = [db_file] + [
+        path for path in db_file.parent.iterdir() if pattern.match(path.name)
+    ]
+    for path in candidates:
+        if path in keep or not path.exists():
+            continue
+        if _remove_db_file(path):
+            print(f"Removed old database file {path.name}.")
+
+
+def full_import(
+    prepared: Dict[str, List[Dict[str, Any]]],
+    validation_errors: List[Dict[str, Any]],
+) -> None:
+    """
+    Builds a complete new database next to the live one, validates it, copies
+    the AuditLog over and publishes it as the next generation. The live file is
+    only read (and locked for writes during the short swap).
+    """
+    stamp = read_schema_stamp()
+    live_file = published_db_file(stamp)
+    generation = int(stamp.get("generation", 0)) + 1
+    shadow_file = generation_db_file(generation)
+    _remove_db_file(shadow_file)
+    print(f"Building new database {shadow_file.name}...")
+    report_progress(45.0, "Loading rows")
+
+    shadow_engine = create_db_engine(sqlite_url(shadow_file), bulk_load=True)
+    try:
+        imported = build_database(shadow_engine, prepared)
+        problems = validate_database(shadow_engine, imported)
+        if problems:
+            for problem in problems:
+                print(f"  Validation failed: {problem}")
+            raise RuntimeError(
+                f"New database {shadow_file.name} failed validation; "
+                f"the live database was left untouched."
+            )
 
-                if not model:
-                    print(
-                        f"Warning: No Pydantic model found for {sheet_name}. Skipping validation."
+        # Log to AuditLog
+        total_imported_rows = sum(imported.values())
+        details_msg = (
+            f"Imported {total_imported_rows} rows into {len(imported)} tables."
+        )
+        if validation_errors:
+            details_msg += f" Found {len(validation_errors)} validation errors."
+
+        live_engine = (
+            create_db_engine(sqlite_url(live_file)) if live_file.exists() else None
+        )
+        with shadow_engine.connect() as conn:
+            live_conn = live_engine.connect() if live_engine is not None else None
+            try:
+                if live_conn is not None:
+                    # Hold the write lock on the live database until the swap so
+                    # no audit entry written meanwhile is lost
+                    live_conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    copied = copy_audit_log(live_conn, conn)
+                    print(f"Copied {copied} AuditLog entries from {live_file.name}.")
+                _log_import(conn, "ALL", details_msg)
+                refresh_row_counts(conn, ["AuditLog"])
+                conn.commit()
+
+                if live_conn is not None:
+                    retire_database(live_conn)
+                # Tell running API processes to switch files and drop their cached schema
+                schema_version = write_schema_stamp(generation=generation)
+                if live_conn is not None:
+                    live_conn.commit()
+            finally:
+                if live_conn is not None:
+                    live_conn.close()
+                if live_engine is not None:
+                    live_engine.dispose()
+    except Exception:
+        shadow_engine.dispose()
+        _remove_db_file(shadow_file)
+        raise
+    shadow_engine.dispose()
+
+    print(
+        f"Published {shadow_file.name} (generation {generation}); "
+        f"schema version stamp updated to {schema_version}."
+    )
+    report_progress(90.0, "Published new database")
+    remove_old_generations(keep=[shadow_file, live_file])
+
+
+def incremental_import_blocker(engine: sqlalchemy.Engine) -> Optional[str]:
+    """Returns why the database cannot be updated incrementally, or None if it can."""
+    if not published_db_file(read_schema_stamp()).exists():
+        return "the database does not exist yet"
+    inspector = sqlalchemy.inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.connect() as conn:
+        search_indexes = current_search_indexes(conn)
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            return f"table '{table.name}' is missing"
+        db_columns = [col["name"] for col in inspector.get_columns(table.name)]
+        if db_columns != [c.name for c in table.columns]:
+            return f"table '{table.name}' does not match the schema"
+        if is_searchable(table.name):
+            index_name = search_index_name(table.name)
+            if index_name not in existing_tables:
+                return f"the search index of '{table.name}' is missing"
+            if index_name not in search_indexes:
+                return f"the search index of '{table.name}' uses an old tokenizer"
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                return f"index '{index.name}' is missing"
+    return None
+
+
+def diff_table(
+    conn, table: sqlalchemy.Table, records: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """
+    Applies only the difference between the sheet rows and the table.
+
+    Tables with a natural primary key (MT_device.type, MT_spec_sheet.sheet_no)
+    are matched by key and changed rows are updated in place. Tables keyed by a
+    surrogate id are matched by row content: unchanged rows keep their id, and
+    changed rows become a delete plus an insert.
+    """
+    if not records:
+        deleted = conn.execute(table.delete()).rowcount
+        return {"inserted": 0, "updated": 0, "deleted": deleted}
+
+    columns = list(records[0])
+    pk_columns = [c.name for c in table.primary_key.columns]
+    if all(name in columns for name in pk_columns):
+        key_columns = pk_columns
+        value_columns = [c for c in columns if c not in key_columns]
+
+        def key_of(row):
+            return tuple(row[k] for k in key_columns)
+
+        existing = {
+            key_of(row): row
+            for row in conn.execute(
+                sqlalchemy.select(*[table.c[c] for c in columns])
+            ).mappings()
+        }
+        incoming = {key_of(r): r for r in records}
+        inserts = [r for key, r in incoming.items() if key not in existing]
+        updates = [
+            r
+            for key, r in incoming.items()
+            if key in existing and any(existing[key][c] != r[c] for c in value_columns)
+        ]
+        deletes = [key for key in existing if key not in incoming]
+
+        if updates and value_columns:
+            stmt = (
+                table.update()
+                .where(
+                    sqlalchemy.and_(
+                        *[
+                            table.c[k] == sqlalchemy.bindparam(f"k{i}")
+                            for i, k in enumerate(key_columns)
+                        ]
                     )
-
-                # Pre-processing
-                # 1. Handle 'id' column
-                id_col = next((c for c in df.columns if c.lower() == "id"), None)
-                if id_col:
-                    df = df.drop(columns=[id_col])
-
-                # 2. Add missing columns (e.g. +/- in MT_elec_characteristic)
-                for col in table.columns:
-                    if col.name not in df.columns and col.name != "id":
-                        if col.name == "+/-":
-                            df[col.name] = None
-
-                # 3. Type conversion and cleaning
-                if "更新日" in df.columns:
-                    df["更新日"] = pd.to_datetime(df["更新日"], errors="coerce").dt.date
-
-                # Coerce numeric columns
-                for col in table.columns:
-                    if isinstance(
-                        col.type,
-                        (sqlalchemy.Integer, sqlalchemy.Float, sqlalchemy.BigInteger),
-                    ):
-                        if col.name in df.columns:
-                            # Use pd.to_numeric to coerce non-numeric values to NaN
-                            df[col.name] = pd.to_numeric(df[col.name], errors="coerce")
-                    elif isinstance(col.type, sqlalchemy.String):
-                        if col.name in df.columns:
-                            # Coerce to string, preserving None
-                            df[col.name] = df[col.name].apply(
-                                lambda x: str(x) if pd.notnull(x) else None
-                            )
-
-                # Validation Loop
-                valid_rows = []
-                for index, row in df.iterrows():
-                    row_dict = row.to_dict()
-                    # Clean NaNs to None for Pydantic
-                    row_dict = {
-                        k: (None if pd.isna(v) else v) for k, v in row_dict.items()
+                )
+                .values(
+                    {
+                        table.c[c]: sqlalchemy.bindparam(f"v{i}")
+                        for i, c in enumerate(value_columns)
                     }
-
-                    # 1. Pydantic Validation
-                    if model:
-                        try:
-                            model.model_validate(row_dict)
-                        except ValidationError as e:
-                            for err in e.errors():
-                                validation_errors.append(
-                                    {
-                                        "sheet": sheet_name,
-                                        "row": index
-                                        + 2,  # Excel row number (1-header + 1-index)
-                                        "column": err["loc"][0],
-                                        "error": err["msg"],
-                                        "value": row_dict.get(err["loc"][0]),
-                                    }
-                                )
-                            # RELAXATION: Do not skip row on Pydantic error, just log it.
-                            # continue
-
-                    # 2. FK Validation
-                    # fk_error = False # RELAXATION: We don't track this for skipping anymore
-                    for (t, c), (ref_t, ref_c) in fk_constraints.items():
-                        if (
-                            t == sheet_name
-                            and c in row_dict
-                            and row_dict[c] is not None
-                        ):
-                            val = row_dict[c]
-                            # Check if val exists in ref_t column ref_c
-                            # We use the original DF for reference to ensure we check against all potential data
-                            # But ideally we should check against valid data.
-                            # For now, check against the loaded DF.
-                            if ref_t in dfs:
-                                ref_df = dfs[ref_t]
-                                if ref_c in ref_df.columns:
-                                    # Use set for faster lookup
-                                    ref_values = set(ref_df[ref_c].dropna().astype(str))
-                                    # Convert val to str for comparison just in case
-                                    if str(val) not in ref_values:
-                                        validation_errors.append(
-                                            {
-                                                "sheet": sheet_name,
-                                                "row": index + 2,
-                                                "column": c,
-                                                "error": f"Foreign Key violation: Value '{val}' not found in {ref_t}.{ref_c}",
-                                                "value": val,
-                                            }
-                                        )
-                                        # fk_error = True # RELAXATION: Warning only
-
-                    # RELAXATION: Always add row, regardless of errors
-                    valid_rows.append(row_dict)
-
-                # Insert valid rows
-                if valid_rows:
-                    # Convert back to DF
-                    df_to_insert = pd.DataFrame(valid_rows)
-
-                    # Ensure columns match table definition
-                    valid_columns = [
-                        c.name for c in table.columns if c.name in df_to_insert.columns
-                    ]
-                    df_to_insert = df_to_insert[valid_columns]
-
-                    try:
-                        df_to_insert.to_sql(
-                            sheet_name, conn, if_exists="append", index=False
-                        )
-                        rows_count = len(df_to_insert)
-                        print(f"  Imported {rows_count} rows into '{sheet_name}'.")
-                        total_imported_rows += rows_count
-                        imported_tables.append(sheet_name)
-                    except Exception as e:
-                        print(f"  Error importing '{sheet_name}': {e}")
-                else:
-                    print(f"  No valid rows to import for '{sheet_name}'.")
-
-            # Report Errors
-            if validation_errors:
-                print("\n" + "=" * 50)
-                print("VALIDATION ERRORS FOUND")
-                print("=" * 50)
-                for err in validation_errors:
-                    print(
-                        f"Sheet: {err['sheet']}, Row: {err['row']}, Col: {err['column']}, Error: {err['error']}, Value: {err['value']}"
-                    )
-                print("=" * 50 + "\n")
-
-                print(f"Total Validation Errors: {len(validation_errors)}")
-                print(
-                    f"Rows with warnings (imported): {len(set((e['sheet'], e['row']) for e in validation_errors))}"
+                )
+            )
+            params = [
+                {
+                    **{f"k{i}": r[k] for i, k in enumerate(key_columns)},
+                    **{f"v{i}": r[c] for i, c in enumerate(value_columns)},
+                }
+                for r in updates
+            ]
+            _execute_batches(conn, stmt, params)
+    else:
+        # Content hash: tuples of Python values hash by value (5 == 5.0)
+        key_columns = pk_columns
+        existing_keys = defaultdict(list)
+        key_count = len(key_columns)
+        for row in conn.execute(
+            sqlalchemy.select(
+                *[table.c[k] for k in key_columns], *[table.c[c] for c in columns]
+            )
+        ):
+            existing_keys[tuple(row[key_count:])].append(tuple(row[:key_count]))
+
+        inserts = []
+        for r in records:
+            matches = existing_keys.get(tuple(r[c] for c in columns))
+            if matches:
+                matches.pop()
+            else:
+                inserts.append(r)
+        updates = []
+        deletes = [key for keys in existing_keys.values() for key in keys]
+
+    if deletes:
+        delete_stmt = table.delete().where(
+            sqlalchemy.and_(
+                *[
+                    table.c[k] == sqlalchemy.bindparam(f"k{i}")
+                    for i, k in enumerate(key_columns)
+                ]
+            )
+        )
+        params = [{f"k{i}": value for i, value in enumerate(key)} for key in deletes]
+        _execute_batches(conn, delete_stmt, params)
+    if inserts:
+        _execute_batches(conn, table.insert(), inserts)
+
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+
+
+def incremental_import(
+    engine: sqlalchemy.Engine,
+    prepared: Dict[str, List[Dict[str, Any]]],
+    validation_errors: List[Dict[str, Any]],
+) -> None:
+    """
+    Updates the existing tables in one transaction with only the changed rows.
+    Search indexes follow through their triggers; the schema is left untouched.
+    """
+    print("Applying incremental changes...")
+    report_progress(45.0, "Applying changes")
+    changed_tables = []
+    summary = {}
+
+    with engine.connect() as conn:
+        for sheet_name, records in prepared.items():
+            diff = diff_table(conn, metadata.tables[sheet_name], records)
+            print(
+                f"  {sheet_name}: {diff['inserted']} inserted, "
+                f"{diff['updated']} updated, {diff['deleted']} deleted."
+            )
+            if any(diff.values()):
+                changed_tables.append(sheet_name)
+                summary[sheet_name] = diff
+                _log_import(
+                    conn,
+                    sheet_name,
+                    json.dumps({"mode": "incremental", **diff}, ensure_ascii=False),
                 )
 
-            # Log to AuditLog
-            audit_log_table = metadata.tables["AuditLog"]
-
-            details_msg = f"Imported {total_imported_rows} rows into {len(imported_tables)} tables."
-            if validation_errors:
-                details_msg += f" Found {len(validation_errors)} validation errors."
+        # Materialised device listing (search index kept in sync by its triggers)
+        if DEVICE_VIEW_SOURCES.intersection(changed_tables):
+            view_rows = rebuild_device_view(conn)
+            print(f"  Rebuilt device_view with {view_rows} rows.")
+
+        # Log to AuditLog
+        details_msg = (
+            f"Incremental import changed {len(changed_tables)} tables: "
+            + json.dumps(summary, ensure_ascii=False)
+        )
+        if validation_errors:
+            details_msg += f" Found {len(validation_errors)} validation errors."
+        _log_import(conn, "ALL", details_msg)
+
+        # Row counts used by unfiltered listings
+        refresh_row_counts(conn, changed_tables + ["AuditLog"])
+        conn.commit()
+
+    # Tell running API processes which tables changed (their schema cache is kept)
+    write_schema_stamp(changed_tables + ["AuditLog"])
+    print(f"Data version stamp updated ({len(changed_tables)} tables changed).")
+    report_progress(90.0, "Published changes")
+
+
+def resolve_excel_engine() -> ExcelEngine:
+    """Configured read engine, or calamine when python-calamine is installed."""
+    if settings.IMPORT_EXCEL_ENGINE:
+        return settings.IMPORT_EXCEL_ENGINE
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+_worker_workbook: bytes = b""
+
+
+def _init_parse_worker(data: bytes) -> None:
+    # The workbook is sent once per worker process, not once per sheet
+    global _worker_workbook
+    _worker_workbook = data
+
+
+def _parse_sheet(
+    sheet_name: str, engine: ExcelEngine
+) -> Tuple[str, List[str], List[Any]]:
+    """Parses one sheet in a worker. Returns it column-wise (one array per column)."""
+    df = pd.read_excel(
+        io.BytesIO(_worker_workbook), sheet_name=sheet_name, engine=engine
+    )
+    columns = [str(c) for c in df.columns]
+    return sheet_name, columns, [df.iloc[:, i].to_numpy() for i in range(len(columns))]
+
+
+def read_sheets(
+    data: bytes, sheet_names: List[str], engine: ExcelEngine, workers: int
+) -> Dict[str, pd.DataFrame]:
+    """
+    Parses the given sheets, in parallel across worker processes when there is
+    more than one sheet and more than one worker.
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(sheet_names))
+    if workers <= 1:
+        xls = pd.ExcelFile(io.BytesIO(data), engine=engine)
+        return {sheet: pd.read_excel(xls, sheet_name=sheet) for sheet in sheet_names}
+
+    print(
+        f"Parsing {len(sheet_names)} sheets with {workers} worker processes ({engine})..."
+    )
+    frames: Dict[str, pd.DataFrame] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_parse_worker, initargs=(data,)
+    ) as pool:
+        futures = [pool.submit(_parse_sheet, sheet, engine) for sheet in sheet_names]
+        for future in futures:
+            sheet, columns, arrays = future.result()
+            frames[sheet] = pd.DataFrame(dict(zip(columns, arrays)), columns=columns)
+    # Keep the workbook's sheet order
+    return {sheet: frames[sheet] for sheet in sheet_names}
+
+
+def sheets_to_load(sheet_names: List[str], changed: List[str]) -> List[str]:
+    """Changed sheets plus the sheets their foreign keys are checked against."""
+    needed = set(changed)
+    for (t, _), (ref_t, _) in FK_CONSTRAINTS.items():
+        if t in changed:
+            needed.add(ref_t)
+    return [sheet for sheet in sheet_names if sheet in needed]
+
+
+def warm_chip_images(db_file: Path) -> None:
+    """Pre-scales the appearance images referenced by the imported masksets."""
+    engine = create_db_engine(sqlite_url(db_file))
+    maskset = metadata.tables["MT_maskset"]
+    with engine.connect() as conn:
+        file_names = conn.execute(
+            sqlalchemy.select(maskset.c.appearance)
+            .where(maskset.c.appearance.is_not(None))
+            .distinct()
+        ).scalars()
+        count = chip_image_cache.warm(file_names)
+    engine.dispose()
+    print(f"Prepared scaled images for {count} chip appearance file(s).")
+    report_progress(97.0, "Prepared images")
+
+
+def import_data(
+    incremental: bool = False, force: bool = False, workers: Optional[int] = None
+):
+    """Imports data from Excel to SQLite using strict schema and Pydantic validation."""
+    master_file = settings.resolved_master_excel_file
+    if not os.path.exists(str(master_file)):
+        print(f"Error: Input file '{master_file}' not found.")
+        sys.exit(1)
 
-            conn.execute(
-                audit_log_table.insert().values(
-                    timestamp=datetime.now().isoformat(),
-                    user="System",
-                    action="IMPORT",
-                    target="ALL",
-                    details=details_msg,
+    try:
+        if incremental:
+            live_file = published_db_file(read_schema_stamp())
+            engine = create_db_engine(sqlite_url(live_file))
+            blocker = incremental_import_blocker(engine)
+            engine.dispose()
+            if blocker is not None:
+                print(
+                    f"Incremental import not possible ({blocker}); running a full import."
                 )
+                incremental = False
+
+        # Skip the run when the workbook is the one already imported
+        live_file = published_db_file(read_schema_stamp())
+        previous = None if force else load_import_fingerprint(live_file)
+        if previous is not None and stat_matches(previous, Path(master_file)):
+            print(
+                f"'{master_file}' is unchanged since the last import "
+                f"(same mtime and size). Nothing to do; use --force to re-import."
             )
-            conn.commit()
+            return
+
+        print(f"Reading data from {master_file}...")
+        report_progress(5.0, "Reading workbook")
+        # Read the file once (network share) and parse from memory
+        data = Path(master_file).read_bytes()
+        fingerprint = workbook_fingerprint(Path(master_file), data)
+        if previous is not None and previous.get("sha256") == fingerprint["sha256"]:
+            save_import_fingerprint(fingerprint, live_file)
+            print(
+                f"'{master_file}' content is unchanged since the last import. "
+                f"Nothing to do; use --force to re-import."
+            )
+            return
 
+        # Read all sheets
+        excel_engine = resolve_excel_engine()
+        sheet_names = [
+            str(sheet)
+            for sheet in pd.ExcelFile(io.BytesIO(data), engine=excel_engine).sheet_names
+        ]
+        print(f"Found sheets: {sheet_names}")
+        report_progress(10.0, "Parsing sheets")
+
+        changed_sheets = sheet_names
+        if incremental and previous is not None and fingerprint["sheets"]:
+            changed_sheets = [
+                sheet
+                for sheet in sheet_names
+                if previous.get("sheets", {}).get(sheet)
+                != fingerprint["sheets"].get(sheet)
+            ]
+            unchanged = [sheet for sheet in sheet_names if sheet not in changed_sheets]
+            if unchanged:
+                print(f"Skipping unchanged sheets: {unchanged}")
+
+        # Load sheets into memory (referenced sheets too, for FK validation);
+        # cross-sheet checks start only after every sheet has been parsed
+        dfs = read_sheets(
+            data,
+            sheets_to_load(sheet_names, changed_sheets),
+            excel_engine,
+            settings.IMPORT_WORKERS if workers is None else workers,
+        )
+
+        prepared, validation_errors = prepare_sheets(changed_sheets, dfs)
+        report_validation_errors(validation_errors)
+
+        if incremental:
+            engine = create_db_engine(sqlite_url(live_file))
+            incremental_import(engine, prepared, validation_errors)
+            engine.dispose()
+        else:
+            full_import(prepared, validation_errors)
+
+        published_file = published_db_file(read_schema_stamp())
+        save_import_fingerprint(fingerprint, published_file)
+        warm_chip_images(published_file)
         print("Import process completed.")
 
     except Exception as e:
@@ -282,4 +970,30 @@ def import_data():
 
 
 if __name__ == "__main__":
-    import_data()
+    parser = argparse.ArgumentParser(description="Import master data from Excel.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Apply only inserted/updated/deleted rows to the existing database "
+        "(falls back to a full import when that is not possible).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Import even if the workbook is unchanged since the last import.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes used to parse sheets (default: IMPORT_WORKERS, 0 = one per "
+        "CPU core, 1 = no worker processes).",
+    )
+    parser.add_argument(
+        "--progress-json",
+        action="store_true",
+        help="Also write machine-readable progress lines (used by import jobs).",
+    )
+    args = parser.parse_args()
+    _progress_json = args.progress_json
+    import_data(incremental=args.incremental, force=args.force, workers=args.workers)
@@ -7,6 +7,7 @@ import {
   AlertCircle,
   Filter,
   Download,
+  Columns3,
   Edit3,
   Check,
   X as CloseIcon,
@@ -15,6 +16,15 @@ import {
 import ThemeToggle from "./ThemeToggle";
 import { buildApiUrl } from "../lib/api";
 
+// Column filter syntax (compiled by the backend, see core/filters.py)
+const FILTER_SYNTAX_HELP = [
+  "abc: 文字列は前方一致（大文字小文字を区別しない）、数値は一致、日付は 2024-05 のように日・月・年単位",
+  "=a|b: 完全一致（いずれか）",
+  ">=10, <10, 10..20: 範囲",
+  "is null / is not null: 空欄 / 空欄以外",
+  "*abc*: 部分一致（大文字小文字を区別しない）",
+].join("\n");
+
 const DataTable = ({
   tableName,
   customUrl,
@@ -23,6 +33,7 @@ const DataTable = ({
   titleContent,
   enableEditing = false,
   refreshSignal = 0,
+  summaryColumns = false,
 }) => {
   const [data, setData] = useState([]);
   const [primaryKeys, setPrimaryKeys] = useState([]);
@@ -38,6 +49,8 @@ const DataTable = ({
   const [searchTerm, setSearchTerm] = useState("");
   const [debouncedSearchTerm, setDebouncedSearchTerm] = useState("");
   const [sortConfig, setSortConfig] = useState({ key: null, direction: "asc" });
+  // With summaryColumns the grid loads only the table's summary columns until expanded
+  const [showAllColumns, setShowAllColumns] = useState(false);
 
   // Filter State
   const [showFilters, setShowFilters] = useState(false);
@@ -126,6 +139,11 @@ const DataTable = ({
       const params = new URLSearchParams();
       params.append("page", currentPage);
       params.append("limit", pageSize);
+      // Rows come as arrays plus one header list (smaller and faster to encode)
+      params.append("format", "columnar");
+      if (summaryColumns && !showAllColumns) {
+        params.append("fields", "summary");
+      }
       if (debouncedSearchTerm) {
         params.append("search", debouncedSearchTerm);
       }
@@ -139,14 +157,18 @@ const DataTable = ({
 
       const response = await axios.get(`${url}?${params.toString()}`);
 
-      if (response.data.data) {
-        setData(response.data.data);
+      if (response.data.rows) {
+        const columnNames = response.data.columns;
+        const records = response.data.rows.map((row) =>
+          Object.fromEntries(columnNames.map((col, i) => [col, row[i]])),
+        );
+        setData(records);
         setPrimaryKeys(response.data.primary_keys || []);
         if (response.data.total !== undefined) {
           setTotalRecords(response.data.total);
           setTotalPages(response.data.total_pages);
         } else {
-          setTotalRecords(response.data.data.length);
+          setTotalRecords(records.length);
           setTotalPages(1);
         }
       } else {
@@ -154,7 +176,8 @@ const DataTable = ({
         setPrimaryKeys([]);
       }
     } catch (err) {
-      setError(err.message);
+      const detail = err.response?.data?.detail;
+      setError(typeof detail === "string" ? detail : err.message);
       console.error("Error fetching data:", err);
     } finally {
       setLoading(false);
@@ -169,6 +192,8 @@ const DataTable = ({
     sortConfig,
     debouncedFilters,
     refreshSignal,
+    summaryColumns,
+    showAllColumns,
   ]);
 
   useEffect(() => {
@@ -549,6 +574,25 @@ const DataTable = ({
           >
             <Filter size={20} />
           </button>
+          {summaryColumns && (
+            <button
+              onClick={() => setShowAllColumns(!showAllColumns)}
+              className="btn btn-ghost"
+              title={showAllColumns ? "主要な列だけを表示します" : "すべての列を表示します"}
+              style={{
+                padding: "0.5rem",
+                borderRadius: "50%",
+                width: "40px",
+                height: "40px",
+                display: "flex",
+                alignItems: "center",
+                justifyContent: "center",
+                ...(showAllColumns ? { backgroundColor: "rgba(0, 0, 0, 0.05)" } : {}),
+              }}
+            >
+              <Columns3 size={20} />
+            </button>
+          )}
           <button
             onClick={handleExport}
             className="btn btn-ghost"
@@ -606,6 +650,7 @@ const DataTable = ({
                       <input
                         type="text"
                         placeholder={`Filter ${col}...`}
+                        title={FILTER_SYNTAX_HELP}
                         value={filters[col] || ""}
                         onChange={(e) => handleFilterChange(col, e.target.value)}
                         style={{
@@ -434,7 +434,7 @@ const DetailDrawer = ({
                       <>
                         <img
                           src={buildApiUrl(
-                            `/static/chip_appearances/${device.appearance}`
+                            `/api/chip-appearances/${device.appearance}/thumbnail`
                           )}
                           alt="Chip Appearance"
                           style={{
@@ -0,0 +1,81 @@
+import React, { useEffect, useState } from 'react';
+import axios from 'axios';
+import { Upload } from 'lucide-react';
+import { buildApiUrl } from '../lib/api';
+
+const POLL_INTERVAL_MS = 1000;
+
+// Starts the Excel import as a background job and shows its progress
+const ImportJobButton = ({ onFinished }) => {
+  const [job, setJob] = useState(null);
+  const [error, setError] = useState(null);
+
+  const running = job && (job.status === 'queued' || job.status === 'running');
+
+  useEffect(() => {
+    if (!running) return undefined;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(buildApiUrl(`/api/jobs/${job.id}`));
+        setJob(response.data);
+        if (response.data.status === 'succeeded' && onFinished) {
+          onFinished();
+        }
+      } catch (err) {
+        setError(err.message);
+      }
+    }, POLL_INTERVAL_MS);
+    return () => clearTimeout(timer);
+  }, [job, running, onFinished]);
+
+  const startImport = async () => {
+    setError(null);
+    try {
+      const response = await axios.post(buildApiUrl('/api/jobs/import'), { incremental: true });
+      setJob(response.data);
+    } catch (err) {
+      const detail = err.response?.data?.detail;
+      setError(typeof detail === 'string' ? detail : err.message);
+    }
+  };
+
+  let status = null;
+  if (error) {
+    status = error;
+  } else if (running) {
+    status = `${Math.round(job.progress || 0)}% ${job.message || ''}`;
+  } else if (job?.status === 'succeeded') {
+    status = job.message || 'Import completed';
+  } else if (job?.status === 'failed') {
+    status = job.error;
+  }
+
+  return (
+    <div style={{ display: 'flex', flexDirection: 'column', gap: '0.25rem' }}>
+      <button
+        onClick={startImport}
+        disabled={running}
+        className="btn btn-ghost"
+        style={{ width: '100%', justifyContent: 'flex-start', paddingLeft: 0 }}
+      >
+        <Upload size={18} />
+        {running ? 'Importing...' : 'Import Excel'}
+      </button>
+      {status && (
+        <span style={{ fontSize: '0.75rem', color: 'var(--text-secondary)' }}>
+          {status}
+          {job && !running && job.artifact && (
+            <>
+              {' '}
+              <a href={buildApiUrl(`/api/jobs/${job.id}/download`)} target="_blank" rel="noreferrer">
+                log
+              </a>
+            </>
+          )}
+        </span>
+      )}
+    </div>
+  );
+};
+
+export default ImportJobButton;
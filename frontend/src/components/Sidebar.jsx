@@ -1,6 +1,7 @@
 import React from 'react';
 import { Table, Database, ArrowLeft, List, Settings, FileSpreadsheet, ClipboardList } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
+import ImportJobButton from './ImportJobButton';
 
 const Sidebar = ({
   mode = 'master', // 'master' or 'user'
@@ -68,6 +69,7 @@ const Sidebar = ({
       )}
 
       <div style={{ marginTop: 'auto', paddingTop: '1rem', borderTop: '1px solid var(--border-color)', display: 'flex', flexDirection: 'column', gap: '0.5rem' }}>
+        {mode === 'master' && <ImportJobButton />}
         {mode === 'master' ? (
           <button
               onClick={() => navigate('/user')}
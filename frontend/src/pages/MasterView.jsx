@@ -134,6 +134,7 @@ function MasterView() {
               <DataTable
                 tableName={selectedTable}
                 enableEditing
+                summaryColumns
                 refreshSignal={tableRefreshSignal}
                 onRowClick={isDeviceTable ? handleDeviceRowClick : undefined}
               />